@@ -1,6 +1,6 @@
 {
     'name': 'Sistema de Gestión de Ventas y Viajes',
-    'version': '1.0.0',
+    'version': '1.0.3',
     'summary': 'Gestión de ventas, viajes, productos y deudas',
     'category': 'Sales',
     'author': 'Tu Empresa',
@@ -9,15 +9,26 @@
     'depends': ['base','mail'],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'views/persona_views.xml',
         'views/producto_views.xml',
         'views/viaje_views.xml',
         'views/venta_views.xml',
         'views/deuda_views.xml',
         'views/pago_deuda_views.xml',
+        'wizard/venta_lote_views.xml',
+        'wizard/pago_persona_views.xml',
         'views/menu.xml',
+        'views/movimiento_caja_views.xml',
+        'views/cierre_diario_views.xml',
+        'views/reporte_viaje_views.xml',
+        'views/reporte_antiguedad_views.xml',
+        'wizard/importacion_views.xml',
+        'wizard/exportacion_views.xml',
+        'wizard/cierre_diario_views.xml',
     ],
     'demo': [],
+    'post_init_hook': 'post_init_hook',
     'installable': True,
     'application': True,
     'auto_install': False,
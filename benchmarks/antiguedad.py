@@ -0,0 +1,31 @@
+"""Tiempo del resumen de antigüedad de deudas, en frío y desde la caché.
+
+Uso (desde la carpeta del servidor Odoo):
+
+    python odoo-bin shell -d <base_de_datos> < ruta/al/modulo/benchmarks/antiguedad.py
+
+El objetivo es que la consulta en frío quede muy por debajo de un segundo con
+200.000 deudas y que las siguientes lecturas del mismo día salgan de la caché.
+"""
+import time
+
+
+def ejecutar(env):
+    Reporte = env['ventas.reporte.antiguedad']
+    env.cr.execute("SELECT COUNT(*) FROM ventas_deuda WHERE estado != 'pagado'")
+    abiertas = env.cr.fetchone()[0]
+    for agrupar in ('persona_id', 'viaje_id'):
+        env.registry.clear_cache()
+        inicio = time.perf_counter()
+        resumen = Reporte.resumen(agrupar)
+        frio = (time.perf_counter() - inicio) * 1000
+        inicio = time.perf_counter()
+        Reporte.resumen(agrupar)
+        caliente = (time.perf_counter() - inicio) * 1000
+        print('%-10s %7s deudas abiertas, %6s grupos: frío %8.2f ms, caché %6.2f ms' % (
+            agrupar, abiertas, len(resumen), frio, caliente,
+        ))
+
+
+if 'env' in globals():
+    ejecutar(env)  # noqa: F821 - inyectado por odoo-bin shell
@@ -0,0 +1,111 @@
+"""EXPLAIN de las consultas calientes del formulario de viaje y de la lista de deudas.
+
+Uso (desde la carpeta del servidor Odoo):
+
+    python odoo-bin shell -d <base_de_datos> < ruta/al/modulo/benchmarks/explain_indices.py
+
+Con pocos registros PostgreSQL prefiere un escaneo secuencial aunque el índice
+exista; los resultados son representativos a partir de unos miles de filas.
+"""
+import json
+import time
+
+CONSULTAS = [
+    (
+        'Lista de ventas del viaje',
+        """SELECT id FROM ventas_venta
+            WHERE viaje_id = %(viaje_id)s
+            ORDER BY fecha_venta DESC""",
+    ),
+    (
+        'Totales del viaje por tipo de pago',
+        """SELECT tipo_pago, SUM(total), SUM(ganancia) FROM ventas_venta
+            WHERE viaje_id = %(viaje_id)s
+            GROUP BY tipo_pago""",
+    ),
+    (
+        'Lista de deudas: pendientes de una persona',
+        """SELECT id FROM ventas_deuda
+            WHERE persona_id = %(persona_id)s
+              AND estado IN ('pendiente', 'vencida')
+            ORDER BY fecha_creacion DESC""",
+    ),
+    (
+        'Deudas abiertas de una persona por vencimiento',
+        """SELECT id FROM ventas_deuda
+            WHERE persona_id = %(persona_id)s
+              AND estado != 'pagado'
+            ORDER BY fecha_estimada_pago""",
+    ),
+    (
+        'Cron de deudas vencidas',
+        """SELECT id FROM ventas_deuda
+            WHERE estado = 'pendiente'
+              AND fecha_estimada_pago < CURRENT_DATE""",
+    ),
+    (
+        'Pagos de una deuda por tipo de pago',
+        """SELECT tipo_pago, SUM(monto) FROM ventas_pago_deuda
+            WHERE deuda_id = %(deuda_id)s
+            GROUP BY tipo_pago""",
+    ),
+    (
+        'Pagos "Este Mes"',
+        """SELECT id FROM ventas_pago_deuda
+            WHERE fecha_pago >= date_trunc('month', CURRENT_DATE)""",
+    ),
+]
+
+
+def _nodos_del_plan(nodo):
+    yield nodo
+    for hijo in nodo.get('Plans', []):
+        yield from _nodos_del_plan(hijo)
+
+
+def _id_mas_frecuente(cr, tabla, columna):
+    cr.execute(f"""
+        SELECT {columna} FROM {tabla}
+         WHERE {columna} IS NOT NULL
+         GROUP BY {columna}
+         ORDER BY COUNT(*) DESC
+         LIMIT 1
+    """)
+    fila = cr.fetchone()
+    return fila[0] if fila else 0
+
+
+def ejecutar(env):
+    cr = env.cr
+    cr.execute('ANALYZE ventas_venta, ventas_deuda, ventas_pago_deuda')
+    parametros = {
+        'viaje_id': _id_mas_frecuente(cr, 'ventas_venta', 'viaje_id'),
+        'persona_id': _id_mas_frecuente(cr, 'ventas_deuda', 'persona_id'),
+        'deuda_id': _id_mas_frecuente(cr, 'ventas_pago_deuda', 'deuda_id'),
+    }
+    fallos = 0
+    for nombre, consulta in CONSULTAS:
+        inicio = time.perf_counter()
+        cr.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + consulta, parametros)
+        plan = cr.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+        nodos = list(_nodos_del_plan(plan['Plan']))
+        usados = {nodo['Index Name'] for nodo in nodos if 'Index Name' in nodo}
+        # Basta con que no haya escaneo secuencial: el planificador puede
+        # elegir cualquiera de los índices que sirven a la consulta
+        ok = not any(nodo['Node Type'] == 'Seq Scan' for nodo in nodos)
+        fallos += not ok
+        print('%-48s %-6s %8.2f ms  (%s)' % (
+            nombre,
+            'OK' if ok else 'SEQ',
+            plan.get('Execution Time', (time.perf_counter() - inicio) * 1000),
+            ', '.join(sorted(usados)) or 'sin índice',
+        ))
+    print('%s de %s consultas se resuelven sin escaneo secuencial' % (len(CONSULTAS) - fallos, len(CONSULTAS)))
+    return fallos
+
+
+if 'env' in globals():
+    ejecutar(env)  # noqa: F821 - inyectado por odoo-bin shell
@@ -0,0 +1,74 @@
+"""Comprueba que las consultas de un mes leen una sola partición anual.
+
+Uso (desde la carpeta del servidor Odoo, con las tablas ya particionadas
+mediante ``env['ventas.particion'].particionar()`` o ``ventas_particionar = True``):
+
+    python odoo-bin shell -d <base_de_datos> < ruta/al/modulo/benchmarks/particiones.py
+
+El filtro "Este Mes" de las vistas no tiene límite superior: además de la
+partición del año lee la partición por defecto, que normalmente está vacía.
+"""
+import json
+
+CONSULTAS = [
+    (
+        'Ventas de un mes',
+        """SELECT id FROM ventas_venta
+            WHERE fecha_venta >= date_trunc('month', CURRENT_DATE)
+              AND fecha_venta < date_trunc('month', CURRENT_DATE) + interval '1 month'""",
+    ),
+    (
+        'Ventas de un viaje en un mes',
+        """SELECT tipo_pago, SUM(total) FROM ventas_venta
+            WHERE viaje_id = %(viaje_id)s
+              AND fecha_venta >= date_trunc('month', CURRENT_DATE)
+              AND fecha_venta < date_trunc('month', CURRENT_DATE) + interval '1 month'
+            GROUP BY tipo_pago""",
+    ),
+    (
+        'Pagos de un mes',
+        """SELECT id FROM ventas_pago_deuda
+            WHERE fecha_pago >= date_trunc('month', CURRENT_DATE)
+              AND fecha_pago < date_trunc('month', CURRENT_DATE) + interval '1 month'""",
+    ),
+]
+
+
+def _tablas_del_plan(nodo):
+    tablas = set()
+    if 'Relation Name' in nodo:
+        tablas.add(nodo['Relation Name'])
+    for hijo in nodo.get('Plans', []):
+        tablas |= _tablas_del_plan(hijo)
+    return tablas
+
+
+def ejecutar(env):
+    cr = env.cr
+    Particion = env['ventas.particion']
+    for tabla in ('ventas_venta', 'ventas_pago_deuda'):
+        if not Particion._es_particionada(tabla):
+            print('%s no está particionada' % tabla)
+            return 1
+    cr.execute('SELECT viaje_id FROM ventas_venta GROUP BY viaje_id ORDER BY COUNT(*) DESC LIMIT 1')
+    fila = cr.fetchone()
+    parametros = {'viaje_id': fila[0] if fila else 0}
+    fallos = 0
+    for nombre, consulta in CONSULTAS:
+        cr.execute('EXPLAIN (ANALYZE, FORMAT JSON) ' + consulta, parametros)
+        plan = cr.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+        particiones = _tablas_del_plan(plan['Plan'])
+        ok = len(particiones) == 1
+        fallos += not ok
+        print('%-32s %-4s %8.2f ms  (%s)' % (
+            nombre, 'OK' if ok else 'NO', plan['Execution Time'], ', '.join(sorted(particiones)),
+        ))
+    print('%s de %s consultas leen una sola partición' % (len(CONSULTAS) - fallos, len(CONSULTAS)))
+    return fallos
+
+
+if 'env' in globals():
+    ejecutar(env)  # noqa: F821 - inyectado por odoo-bin shell
@@ -0,0 +1,3 @@
+from . import exportacion
+from . import resumen
+from . import sincronizacion
\ No newline at end of file
@@ -0,0 +1,112 @@
+import csv
+import io
+import zlib
+
+from werkzeug.exceptions import NotFound
+
+from odoo import api, fields, http
+from odoo.http import request, Response
+from odoo.modules.registry import Registry
+from odoo.tools import SQL
+
+# Filas que se traen del cursor del servidor en cada vuelta
+TAMANO_BLOQUE = 2000
+
+# tipo -> (modelo, campo fecha del rango, columnas exportadas)
+EXPORTACIONES = {
+    'ventas': ('ventas.venta', 'fecha_venta', [
+        'fecha_venta', 'viaje_id', 'producto_id', 'cantidad', 'precio_unitario',
+        'total', 'ganancia', 'tipo_pago', 'persona_id',
+    ]),
+    'deudas': ('ventas.deuda', 'fecha_creacion', [
+        'fecha_creacion', 'viaje_id', 'persona_id', 'producto_id', 'cantidad',
+        'monto_total', 'total_pagado', 'monto_pendiente', 'estado', 'fecha_estimada_pago',
+    ]),
+    'pagos': ('ventas.pago.deuda', 'fecha_pago', [
+        'fecha_pago', 'viaje_id', 'persona_id', 'deuda_id', 'monto', 'tipo_pago',
+    ]),
+}
+
+
+def _valor_csv(valor):
+    if valor is False or valor is None:
+        return ''
+    if isinstance(valor, tuple):
+        # many2one leído: (id, nombre)
+        return valor[1]
+    return valor
+
+
+def _comprimir(bloques):
+    """Comprime en gzip un flujo de bytes sin acumularlo"""
+    compresor = zlib.compressobj(wbits=31)
+    for bloque in bloques:
+        datos = compresor.compress(bloque)
+        if datos:
+            yield datos
+    yield compresor.flush()
+
+
+class Exportacion(http.Controller):
+
+    @http.route('/ventas/exportar/<string:tipo>', type='http', auth='user')
+    def exportar(self, tipo, desde=None, hasta=None, comprimir=None, **kwargs):
+        """CSV en streaming de ventas, deudas o pagos entre ``desde`` y ``hasta``"""
+        if tipo not in EXPORTACIONES:
+            raise NotFound()
+        modelo, campo_fecha, campos = EXPORTACIONES[tipo]
+        request.env[modelo].check_access('read')
+        dominio = []
+        if desde:
+            dominio.append((campo_fecha, '>=', fields.Date.to_date(desde)))
+        if hasta:
+            dominio.append((campo_fecha, '<', fields.Date.add(fields.Date.to_date(hasta), days=1)))
+
+        contenido = self._filas_csv(
+            request.db, request.env.uid, dict(request.env.context), modelo, dominio, campos,
+        )
+        nombre = f'{tipo}.csv'
+        cabeceras = [('Content-Type', 'text/csv; charset=utf-8')]
+        if comprimir:
+            contenido = _comprimir(contenido)
+            nombre += '.gz'
+            cabeceras = [('Content-Type', 'application/gzip')]
+        cabeceras.append(('Content-Disposition', http.content_disposition(nombre)))
+        return Response(contenido, headers=cabeceras, direct_passthrough=True)
+
+    def _filas_csv(self, db, uid, context, modelo, dominio, campos):
+        """Generador de bloques CSV leídos con un cursor del lado del servidor.
+
+        Usa su propio cursor de base de datos porque el de la petición se
+        cierra antes de que termine el envío.
+        """
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+
+        def vaciar():
+            datos = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            return datos
+
+        with Registry(db).cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            # Las ventas y deudas de viajes cerrados también se exportan
+            Modelo = env[modelo].with_context(active_test=False)
+            escritor.writerow([Modelo._fields[campo].string for campo in campos])
+            # La cabecera sale antes de ejecutar ninguna consulta pesada
+            yield vaciar()
+
+            consulta = Modelo._search(dominio, order='id')
+            cr.execute(SQL('DECLARE ventas_exportacion NO SCROLL CURSOR FOR %s', consulta.select()))
+            while True:
+                cr.execute('FETCH %s FROM ventas_exportacion', (TAMANO_BLOQUE,))
+                ids = [fila[0] for fila in cr.fetchall()]
+                if not ids:
+                    break
+                # read() resuelve los nombres de los many2one de todo el bloque a la vez
+                for registro in Modelo.browse(ids).read(campos):
+                    escritor.writerow([_valor_csv(registro[campo]) for campo in campos])
+                yield vaciar()
+                env.invalidate_all()
+            cr.execute('CLOSE ventas_exportacion')
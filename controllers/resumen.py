@@ -0,0 +1,12 @@
+from odoo import http
+from odoo.http import request
+
+
+class ResumenViaje(http.Controller):
+
+    @http.route('/ventas/viaje/resumen', type='json', auth='user')
+    def resumen(self, viaje_ids=None, **kwargs):
+        """Resumen financiero en caché de los viajes pedidos (o de los abiertos)"""
+        Viaje = request.env['ventas.viaje']
+        viajes = Viaje.browse(viaje_ids).exists() if viaje_ids else Viaje.search([])
+        return viajes.resumen_financiero()
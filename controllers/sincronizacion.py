@@ -0,0 +1,30 @@
+import logging
+
+from psycopg2 import errors
+
+from odoo import api, http
+from odoo.http import request
+from odoo.modules.registry import Registry
+
+_logger = logging.getLogger(__name__)
+
+# Un reenvío concurrente del mismo lote choca con la clave única o con el
+# bloqueo del stock; se repite con una transacción nueva, que ya lo ve
+MAX_INTENTOS = 5
+
+
+class Sincronizacion(http.Controller):
+
+    @http.route('/ventas/sincronizar', type='json', auth='user', methods=['POST'])
+    def sincronizar(self, ventas=None, pagos=None, **kwargs):
+        """Aplica en una transacción un lote de ventas y pagos registrados sin conexión"""
+        ventas, pagos = ventas or [], pagos or []
+        for intento in range(1, MAX_INTENTOS + 1):
+            try:
+                with Registry(request.db).cursor() as cr:
+                    env = api.Environment(cr, request.env.uid, dict(request.env.context))
+                    return env['ventas.sincronizacion'].aplicar_lote(ventas, pagos)
+            except (errors.UniqueViolation, errors.SerializationFailure) as error:
+                if intento == MAX_INTENTOS:
+                    raise
+                _logger.info('Sincronización: reintento %s tras %s', intento, error.pgcode)
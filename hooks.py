@@ -0,0 +1,3 @@
+def post_init_hook(env):
+    """Particiona ventas y pagos al instalar si el servidor lo pide"""
+    env['ventas.particion']._particionar_si_configurado()
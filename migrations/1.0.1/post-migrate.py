@@ -0,0 +1,10 @@
+def migrate(cr, version):
+    """Congela en las deudas existentes el precio con que se calcularon.
+
+    Se deduce del monto ya guardado para que ninguna deuda cambie de importe.
+    """
+    cr.execute("""
+        UPDATE ventas_deuda
+           SET precio_unitario = monto_total / NULLIF(cantidad, 0)
+         WHERE precio_unitario IS NULL
+    """)
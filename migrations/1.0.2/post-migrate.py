@@ -0,0 +1,27 @@
+def migrate(cr, version):
+    """Abre el libro de caja con el dinero ya cobrado antes de que existiera"""
+    cr.execute("SELECT 1 FROM ventas_movimiento_caja LIMIT 1")
+    if cr.fetchone():
+        return
+    cr.execute("""
+        INSERT INTO ventas_movimiento_caja
+               (fecha, tipo_pago, monto, saldo, concepto, create_date, write_date)
+        SELECT now() AT TIME ZONE 'UTC', tipo_pago, SUM(monto), SUM(monto), 'Saldo inicial',
+               now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+          FROM (
+                SELECT tipo_pago, total AS monto
+                  FROM ventas_venta
+                 WHERE tipo_pago IN ('efectivo', 'transferencia')
+             UNION ALL
+                SELECT tipo_pago, monto
+                  FROM ventas_pago_deuda
+               ) cobros
+         GROUP BY tipo_pago
+        HAVING SUM(monto) != 0
+    """)
+    cr.execute("""
+        UPDATE ventas_movimiento_caja_saldo s
+           SET saldo = COALESCE((SELECT SUM(m.monto)
+                                   FROM ventas_movimiento_caja m
+                                  WHERE m.tipo_pago = s.tipo_pago), 0)
+    """)
@@ -0,0 +1,7 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Particiona ventas y pagos por año si el servidor tiene ``ventas_particionar = True``"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['ventas.particion']._particionar_si_configurado()
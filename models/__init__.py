@@ -1,7 +1,15 @@
+from . import agregacion
 from . import persona
 from . import producto
 from . import viaje
 from . import viaje_producto
 from . import venta
 from . import deuda
-from . import pago_deuda
\ No newline at end of file
+from . import pago_deuda
+from . import movimiento_caja
+from . import reporte_viaje
+from . import cierre_diario
+from . import recalculo_pendiente
+from . import sincronizacion
+from . import particion
+from . import reporte_antiguedad
\ No newline at end of file
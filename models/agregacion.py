@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from odoo import models, api
+
+
+# Cachés con versión propia: cada una tiene su secuencia ventas_version_<nombre>_seq
+VERSIONES = ('deudas',)
+
+
+class Agregacion(models.AbstractModel):
+    _name = 'ventas.agregacion'
+    _description = 'Agregación de totales por lotes'
+
+    def init(self):
+        for nombre in VERSIONES:
+            self.env.cr.execute(f'CREATE SEQUENCE IF NOT EXISTS ventas_version_{nombre}_seq')
+        # El resumen financiero lleva ahora su versión en cada viaje
+        self.env.cr.execute('DROP SEQUENCE IF EXISTS ventas_version_viajes_seq')
+
+    @api.model
+    def _version(self, nombre):
+        """Versión de la caché ``nombre``, o None si no se puede guardar en caché.
+
+        Cada cambio lleva la secuencia a su instante en microsegundos (ver
+        ``_cambiar_version``). Si la versión es posterior al inicio de esta
+        transacción, su foto puede no incluir ese cambio y el resultado no se
+        guarda; si es anterior, el cambio ya estaba confirmado.
+        """
+        self.env.cr.execute(f"""
+            SELECT last_value, (EXTRACT(EPOCH FROM transaction_timestamp()) * 1000000)::bigint
+              FROM ventas_version_{nombre}_seq
+        """)
+        version, inicio = self.env.cr.fetchone()
+        return version if version < inicio else None
+
+    @api.model
+    def _cambiar_version(self, *nombres):
+        """Avanza las versiones ahora y otra vez después del commit.
+
+        Las secuencias no son transaccionales: el primer avance vale para las
+        lecturas de esta misma transacción y el segundo, para las que empiecen
+        cuando el cambio ya es visible.
+        """
+        cr = self.env.cr
+
+        def avanzar(nombres):
+            for nombre in sorted(nombres):
+                secuencia = f'ventas_version_{nombre}_seq'
+                cr.execute(
+                    "SELECT setval(%s, GREATEST(nextval(%s),"
+                    " (EXTRACT(EPOCH FROM clock_timestamp()) * 1000000)::bigint))",
+                    (secuencia, secuencia),
+                )
+
+        avanzar(nombres)
+        pendientes = cr.postcommit.data.setdefault('ventas.versiones', set())
+        if not pendientes:
+            cr.postcommit.add(lambda: avanzar(pendientes))
+        pendientes.update(nombres)
+
+    @api.model
+    def _sumar(self, modelo, dominio, grupos, agregados):
+        """Agrega ``modelo`` con un único GROUP BY.
+
+        Devuelve ``{clave: {agregado: valor}}`` donde la clave es el id (o el
+        valor) del único grupo, o una tupla si se agrupa por varios campos.
+        Los grupos sin filas devuelven 0 para cualquier agregado. Incluye los
+        registros archivados de viajes cerrados: son historia, no basura.
+        """
+        resultado = defaultdict(lambda: defaultdict(float))
+        Modelo = self.env[modelo].with_context(active_test=False)
+        for fila in Modelo._read_group(dominio, grupos, agregados):
+            claves = tuple(
+                valor.id if isinstance(valor, models.BaseModel) else valor
+                for valor in fila[:len(grupos)]
+            )
+            clave = claves[0] if len(claves) == 1 else claves
+            valores = (valor or 0 for valor in fila[len(grupos):])
+            resultado[clave].update(zip(agregados, valores))
+        return resultado
@@ -0,0 +1,156 @@
+from datetime import datetime, time, timedelta
+
+import pytz
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+# Campos que se pueden tocar después de cerrar el día
+CAMPOS_EDITABLES = {'efectivo_contado', 'nota'}
+
+
+class CierreDiario(models.Model):
+    _name = 'ventas.cierre.diario'
+    _description = 'Cierre Diario de Caja'
+    _order = 'fecha desc'
+    _rec_name = 'fecha'
+
+    fecha = fields.Date(string='Fecha', required=True, readonly=True, index=True)
+    ventas_efectivo = fields.Float(string='Ventas en Efectivo', readonly=True)
+    ventas_transferencia = fields.Float(string='Ventas por Transferencia', readonly=True)
+    ventas_deuda = fields.Float(string='Ventas a Crédito', readonly=True)
+    pagos_efectivo = fields.Float(string='Cobros de Deuda en Efectivo', readonly=True)
+    pagos_transferencia = fields.Float(string='Cobros de Deuda por Transferencia', readonly=True)
+    total_efectivo = fields.Float(string='Total Efectivo', readonly=True)
+    total_transferencia = fields.Float(string='Total Transferencia', readonly=True)
+    ganancia = fields.Float(string='Ganancia', readonly=True)
+    cantidad_ventas = fields.Integer(string='Ventas', readonly=True)
+    cantidad_pagos = fields.Integer(string='Pagos', readonly=True)
+    unidades_vendidas = fields.Integer(string='Unidades Vendidas', readonly=True)
+    saldo_efectivo = fields.Float(
+        string='Saldo de Efectivo',
+        readonly=True,
+        help='Efectivo acumulado en el libro de caja al terminar el día'
+    )
+    saldo_transferencia = fields.Float(string='Saldo de Transferencias', readonly=True)
+    efectivo_contado = fields.Float(string='Efectivo Contado')
+    diferencia = fields.Float(
+        string='Diferencia',
+        compute='_compute_diferencia',
+        store=True,
+        help='Efectivo contado menos el efectivo cobrado en el día'
+    )
+    nota = fields.Text(string='Nota')
+    linea_ids = fields.One2many(
+        'ventas.cierre.diario.linea',
+        'cierre_id',
+        string='Productos Vendidos',
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('fecha_unica', 'UNIQUE(fecha)', 'Ese día ya está cerrado'),
+    ]
+
+    @api.depends('efectivo_contado', 'total_efectivo')
+    def _compute_diferencia(self):
+        for cierre in self:
+            cierre.diferencia = cierre.efectivo_contado - cierre.total_efectivo
+
+    @api.model
+    def _limites_dia(self, fecha):
+        """Inicio y fin (UTC, sin zona) del día ``fecha`` en la zona del usuario"""
+        zona = pytz.timezone(self.env.context.get('tz') or self.env.user.tz or 'UTC')
+        inicio = zona.localize(datetime.combine(fecha, time.min)).astimezone(pytz.utc)
+        fin = zona.localize(datetime.combine(fecha + timedelta(days=1), time.min)).astimezone(pytz.utc)
+        return inicio.replace(tzinfo=None), fin.replace(tzinfo=None)
+
+    @api.model
+    def _foto_dia(self, fecha):
+        """Valores del cierre de ``fecha`` leídos con una sola consulta agrupada"""
+        inicio, fin = self._limites_dia(fecha)
+        self.env['ventas.venta'].flush_model(['fecha_venta', 'tipo_pago', 'producto_id', 'cantidad', 'total', 'ganancia'])
+        self.env['ventas.venta'].flush_model(['deuda_id'])
+        self.env['ventas.deuda'].flush_model(['fecha_creacion', 'producto_id', 'cantidad', 'monto_total'])
+        self.env['ventas.pago.deuda'].flush_model(['fecha_pago', 'tipo_pago', 'monto'])
+        self.env.cr.execute("""
+            SELECT 'venta', tipo_pago, producto_id,
+                   SUM(cantidad), SUM(total), SUM(ganancia), COUNT(*)
+              FROM ventas_venta
+             WHERE fecha_venta >= %(inicio)s AND fecha_venta < %(fin)s
+             GROUP BY tipo_pago, producto_id
+         UNION ALL
+            -- Deudas creadas directamente, sin venta a crédito que ya las cuente
+            SELECT 'venta', 'deuda', d.producto_id,
+                   SUM(d.cantidad), SUM(d.monto_total), 0, COUNT(*)
+              FROM ventas_deuda d
+             WHERE d.fecha_creacion >= %(inicio)s AND d.fecha_creacion < %(fin)s
+               AND NOT EXISTS (SELECT 1 FROM ventas_venta v WHERE v.deuda_id = d.id)
+             GROUP BY d.producto_id
+         UNION ALL
+            SELECT 'pago', tipo_pago, NULL,
+                   0, SUM(monto), 0, COUNT(*)
+              FROM ventas_pago_deuda
+             WHERE fecha_pago >= %(inicio)s AND fecha_pago < %(fin)s
+             GROUP BY tipo_pago
+        """, {'inicio': inicio, 'fin': fin})
+
+        vals = dict.fromkeys([
+            'ventas_efectivo', 'ventas_transferencia', 'ventas_deuda',
+            'pagos_efectivo', 'pagos_transferencia', 'ganancia',
+        ], 0.0)
+        vals.update(cantidad_ventas=0, cantidad_pagos=0, unidades_vendidas=0)
+        lineas = {}
+        for origen, tipo_pago, producto_id, cantidad, total, ganancia, filas in self.env.cr.fetchall():
+            if origen == 'pago':
+                vals[f'pagos_{tipo_pago}'] += total or 0.0
+                vals['cantidad_pagos'] += filas
+                continue
+            vals[f'ventas_{tipo_pago}'] += total or 0.0
+            vals['cantidad_ventas'] += filas
+            vals['unidades_vendidas'] += cantidad or 0
+            if tipo_pago != 'deuda':
+                vals['ganancia'] += ganancia or 0.0
+            linea = lineas.setdefault(producto_id, {'producto_id': producto_id, 'cantidad': 0, 'total': 0.0})
+            linea['cantidad'] += cantidad or 0
+            linea['total'] += total or 0.0
+
+        vals['total_efectivo'] = vals['ventas_efectivo'] + vals['pagos_efectivo']
+        vals['total_transferencia'] = vals['ventas_transferencia'] + vals['pagos_transferencia']
+        saldos = self.env['ventas.movimiento.caja'].saldo_a_fecha(fin)
+        vals['saldo_efectivo'] = saldos['efectivo']
+        vals['saldo_transferencia'] = saldos['transferencia']
+        vals['fecha'] = fecha
+        vals['linea_ids'] = [fields.Command.create(linea) for linea in lineas.values()]
+        return vals
+
+    @api.model
+    def cerrar_dia(self, fecha, **valores):
+        """Congela el resumen de ``fecha``; ``valores`` completa los campos editables"""
+        fecha = fields.Date.to_date(fecha)
+        if self.search_count([('fecha', '=', fecha)]):
+            raise UserError(f'El día {fecha} ya está cerrado')
+        return self.create(dict(self._foto_dia(fecha), **valores))
+
+    def write(self, vals):
+        if set(vals) - CAMPOS_EDITABLES:
+            raise UserError('Un cierre diario no se puede modificar; elimínelo y vuelva a cerrar el día')
+        return super().write(vals)
+
+
+class CierreDiarioLinea(models.Model):
+    _name = 'ventas.cierre.diario.linea'
+    _description = 'Producto Vendido en el Cierre Diario'
+    _order = 'total desc'
+
+    cierre_id = fields.Many2one(
+        'ventas.cierre.diario',
+        string='Cierre',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+    fecha = fields.Date(related='cierre_id.fecha', store=True, string='Fecha')
+    producto_id = fields.Many2one('ventas.producto', string='Producto', readonly=True)
+    cantidad = fields.Integer(string='Cantidad', readonly=True)
+    total = fields.Float(string='Total', readonly=True)
@@ -1,5 +1,18 @@
 from odoo import models, fields, api
+from collections import defaultdict
 from datetime import date
+import logging
+_logger = logging.getLogger(__name__)
+
+# Campos de la deuda que cambian su aporte a los totales del viaje
+CAMPOS_TOTALES_VIAJE = {'viaje_producto_id', 'cantidad', 'precio_unitario', 'pagos_ids'}
+# Campos de la deuda que pueden cambiar su estado o su producto
+CAMPOS_ESTADO = CAMPOS_TOTALES_VIAJE | {'fecha_estimada_pago'}
+
+# Valores de ``ventas.seguimiento_deudas``: 'completo' registra cada cambio
+# seguido, 'resumen' deja un mensaje por deuda y lote de pagos y 'apagado' no
+# escribe nada en el chatter por pagos, vencimientos ni importaciones
+POLITICAS_SEGUIMIENTO = ('completo', 'resumen', 'apagado')
 
 class Deuda(models.Model):
     _name = 'ventas.deuda'
@@ -18,14 +31,16 @@ class Deuda(models.Model):
         'ventas.viaje.producto',
         string='Producto del Viaje',
         required=True,
-        domain="[('viaje_id', '=', viaje_id)]"
+        domain="[('viaje_id', '=', viaje_id)]",
+        index=True
     )
 
     viaje_id = fields.Many2one(
         'ventas.viaje',
         string='Viaje',
         related='viaje_producto_id.viaje_id',
-        store=True
+        store=True,
+        index=True
     )
 
     producto_id = fields.Many2one(
@@ -33,11 +48,18 @@ class Deuda(models.Model):
         string='Producto',
         related='viaje_producto_id.producto_id',
         store=True,
-        readonly=True
+        readonly=True,
+        index=True
     )
 
     cantidad = fields.Integer(string='Cantidad', required=True, default=1)
 
+    # Archivada al cerrar su viaje
+    active = fields.Boolean(string='Activo', default=True, index=True)
+
+    # Precio congelado al crear la deuda; ver action_repreciar
+    precio_unitario = fields.Float(string='Precio Unitario')
+
     monto_total = fields.Float(
         string='Total',
         compute='_compute_total',
@@ -94,234 +116,27 @@ class Deuda(models.Model):
         store=False
     )
 
-    estado_html = fields.Html(
-        string='Estado',
-        compute='_compute_estado_html',
-        store=False,
-        sanitize=False
-    )
-    
-    @api.depends('estado', 'monto_pendiente', 'monto_total')
-    def _compute_estado_html(self):
-        for deuda in self:
-            if deuda.estado == 'pendiente':
-                html = '''
-                    <div style="
-                        background-color: red;
-                        color: white;
-                        padding: 6px 14px;
-                        border-radius: 16px;
-                        display: inline-flex;
-                        align-items: center;
-                        gap: 8px;
-                        font-weight: 600;
-                        font-size: 12px;
-                        border: 1px solid #ffeaa7;
-                        box-shadow: 0 1px 3px rgba(255, 193, 7, 0.1);
-                    ">
-                        <i class="fa fa-clock" style="font-size: 12px;"></i>
-                        <span>Pendiente</span>
-                    </div>
-                '''
-            
-            elif deuda.estado == 'parcial':
-                # Calcular porcentaje pagado
-                porcentaje = 0
-                if deuda.monto_total and deuda.monto_total > 0:
-                    monto_pagado = deuda.monto_total - (deuda.monto_pendiente or 0)
-                    porcentaje = (monto_pagado / deuda.monto_total) * 100
-                
-                html = f'''
-                    <div style="
-                        display: flex;
-                        flex-direction: column;
-                        gap: 4px;
-                        min-width: 120px;
-                    ">
-                        <div style="
-                            background-color: #fff3cd;
-                            color: #856404;
-                            padding: 4px 12px;
-                            border-radius: 12px;
-                            display: inline-flex;
-                            align-items: center;
-                            gap: 6px;
-                            font-weight: 600;
-                            font-size: 11px;
-                            border: 1px solid #ffeaa7;
-                        ">
-                            <i class="fa fa-percentage" style="font-size: 11px;"></i>
-                            <span>Pago Parcial</span>
-                        </div>
-                        <div style="
-                            display: flex;
-                            align-items: center;
-                            gap: 8px;
-                            font-size: 10px;
-                            color: #6c757d;
-                        ">
-                            <div style="
-                                flex: 1;
-                                height: 6px;
-                                background: #e9ecef;
-                                border-radius: 3px;
-                                overflow: hidden;
-                            ">
-                                <div style="
-                                    width: {porcentaje:.0f}%;
-                                    height: 100%;
-                                    background: linear-gradient(90deg, #ffc107, #fd7e14);
-                                    border-radius: 3px;
-                                "></div>
-                            </div>
-                            <span style="font-weight: 600;">{porcentaje:.0f}%</span>
-                        </div>
-                    </div>
-                '''
-            
-            elif deuda.estado == 'pagado':
-                html = '''
-                    <div style="
-                        background: linear-gradient(135deg, #28a745 0%, #20c997 100%);
-                        color: white;
-                        padding: 6px 14px;
-                        border-radius: 16px;
-                        display: inline-flex;
-                        align-items: center;
-                        gap: 8px;
-                        font-weight: 600;
-                        font-size: 12px;
-                        box-shadow: 0 2px 4px rgba(40, 167, 69, 0.2);
-                    ">
-                        <i class="fa fa-check-circle" style="font-size: 12px;"></i>
-                        <span>Pagado</span>
-                    </div>
-                '''
-            
-            else:  # vencida
-                html = '''
-                    <div style="
-                        background: linear-gradient(135deg, #dc3545 0%, #c82333 100%);
-                        color: white;
-                        padding: 6px 14px;
-                        border-radius: 16px;
-                        display: inline-flex;
-                        align-items: center;
-                        gap: 8px;
-                        font-weight: 600;
-                        font-size: 12px;
-                        box-shadow: 0 2px 4px rgba(220, 53, 69, 0.2);
-                    ">
-                        <i class="fa fa-exclamation-triangle" style="font-size: 12px;"></i>
-                        <span>Vencida</span>
-                    </div>
-                '''
-            
-            deuda.estado_html = html
-    
-    # Campo para mostrar días de vencimiento (si tienes fecha_estimada_pago)
-    dias_vencimiento_html = fields.Html(
-        string='Días',
-        compute='_compute_dias_vencimiento_html',
-        store=False,
-        sanitize=False
-    )
-    
-    @api.depends('fecha_estimada_pago', 'estado')
-    def _compute_dias_vencimiento_html(self):
-        for deuda in self:
-            hoy = date.today()
-            dias_texto = ''
-            color = '#6c757d'
-            bg_color = '#f8f9fa'
-            icon = 'fa-calendar'
-            
-            if deuda.fecha_estimada_pago:
-                diferencia = (deuda.fecha_estimada_pago - hoy).days
-                
-                if diferencia < 0:  # Vencida
-                    dias = abs(diferencia)
-                    dias_texto = f'{dias} día{"s" if dias != 1 else ""} vencido{"s" if dias != 1 else ""}'
-                    color = '#dc3545'
-                    bg_color = '#f8d7da'
-                    icon = 'fa-exclamation-circle'
-                
-                elif diferencia == 0:  # Vence hoy
-                    dias_texto = 'Vence hoy'
-                    color = '#ffc107'
-                    bg_color = '#fff3cd'
-                    icon = 'fa-exclamation'
-                
-                elif diferencia <= 7:  # Pronto a vencer
-                    dias_texto = f'{diferencia} día{"s" if diferencia != 1 else ""}'
-                    color = '#fd7e14'
-                    bg_color = '#ffe5d0'
-                    icon = 'fa-clock'
-                
-                else:  # A tiempo
-                    dias_texto = f'{diferencia} días'
-                    color = '#28a745'
-                    bg_color = '#d4edda'
-                    icon = 'fa-calendar-check'
-            
-            if dias_texto:
-                html = f'''
-                    <div style="
-                        background-color: {bg_color};
-                        color: {color};
-                        padding: 4px 10px;
-                        border-radius: 12px;
-                        display: inline-flex;
-                        align-items: center;
-                        gap: 6px;
-                        font-weight: 500;
-                        font-size: 11px;
-                        border: 1px solid {color}30;
-                    ">
-                        <i class="fa {icon}" style="font-size: 10px;"></i>
-                        <span>{dias_texto}</span>
-                    </div>
-                '''
-            else:
-                html = '''
-                    <div style="
-                        color: #6c757d;
-                        font-size: 11px;
-                        font-style: italic;
-                    ">
-                        Sin fecha
-                    </div>
-                '''
-            
-            deuda.dias_vencimiento_html = html
-    
-    # Campo combinado: estado + días vencimiento
-    estado_completo_html = fields.Html(
-        string='Estado Completo',
-        compute='_compute_estado_completo_html',
-        store=False,
-        sanitize=False
-    )
-    
-    @api.depends('estado_html', 'dias_vencimiento_html')
-    def _compute_estado_completo_html(self):
-        for deuda in self:
-            deuda.estado_completo_html = f'''
-                <div style="display: flex; flex-direction: column; gap: 4px;">
-                    <div>{deuda.estado_html or ""}</div>
-                    <div>{deuda.dias_vencimiento_html or ""}</div>
-                </div>
-            '''
-
-    @api.depends('cantidad', 'viaje_producto_id')
+    @api.depends('cantidad', 'precio_unitario')
     def _compute_total(self):
         for deuda in self:
-            deuda.monto_total = deuda.cantidad * deuda.viaje_producto_id.precio_venta
+            deuda.monto_total = deuda.cantidad * deuda.precio_unitario
+
+    @api.onchange('viaje_producto_id')
+    def _onchange_viaje_producto_id(self):
+        self.precio_unitario = self.viaje_producto_id.precio_venta
 
     @api.depends('pagos_ids', 'monto_total','pagos_ids.monto')
     def _compute_pagos(self):
+        reales = self.filtered('id')
+        pagos = self.env['ventas.agregacion']._sumar(
+            'ventas.pago.deuda', [('deuda_id', 'in', reales.ids)],
+            ['deuda_id'], ['monto:sum'],
+        )
         for deuda in self:
-            deuda.total_pagado = sum(deuda.pagos_ids.mapped('monto'))
+            if deuda.id:
+                deuda.total_pagado = pagos[deuda.id]['monto:sum']
+            else:
+                deuda.total_pagado = sum(deuda.pagos_ids.mapped('monto'))
             deuda.monto_pendiente = deuda.monto_total - deuda.total_pagado
 
     @api.depends('monto_pendiente', 'fecha_estimada_pago')
@@ -337,6 +152,102 @@ class Deuda(models.Model):
             else:
                 deuda.estado = 'pendiente'
 
+    def init(self):
+        # La versión del resumen financiero ya no se lee de write_date
+        self.env.cr.execute("DROP INDEX IF EXISTS ventas_deuda_viaje_write_date_idx")
+        # Índices de una columna que ya cubre la primera columna de los compuestos
+        self.env.cr.execute("DROP INDEX IF EXISTS ventas_deuda__persona_id_index")
+        # Índice parcial para el cron de vencidas: solo cubre deudas pendientes
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS ventas_deuda_pendiente_fecha_idx
+                ON ventas_deuda (fecha_estimada_pago)
+             WHERE estado = 'pendiente'
+        """)
+        # Deudas de una persona filtradas por estado (ficha y filtros de la lista)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS ventas_deuda_persona_estado_idx
+                ON ventas_deuda (persona_id, estado)
+        """)
+        # Deudas abiertas por persona, en orden de vencimiento
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS ventas_deuda_abierta_persona_idx
+                ON ventas_deuda (persona_id, fecha_estimada_pago)
+             WHERE estado != 'pagado'
+        """)
+
+    @api.model
+    def _politica_seguimiento(self):
+        """Política de chatter del parámetro ``ventas.seguimiento_deudas``"""
+        politica = self.env['ir.config_parameter'].sudo().get_param('ventas.seguimiento_deudas')
+        return politica if politica in POLITICAS_SEGUIMIENTO else 'completo'
+
+    def _seguimiento_pagos(self, estados_antes, detalles):
+        """Aplica la política de seguimiento tras un lote de pagos.
+
+        Fuera del modo 'completo' los campos recalculados por los pagos se
+        calculan aquí sin tracking; en modo 'resumen' cada deuda recibe un
+        único mensaje con los pagos del lote y su cambio de estado.
+        """
+        politica = self._politica_seguimiento()
+        if politica == 'completo':
+            return
+        deudas = self.exists()
+        deudas.with_context(tracking_disable=True)._recompute_recordset()
+        if politica != 'resumen':
+            return
+        etiquetas = dict(self._fields['estado'].selection)
+        cuerpos = {}
+        for deuda in deudas:
+            lineas = list(detalles.get(deuda.id, ()))
+            antes = estados_antes.get(deuda.id)
+            if antes and antes != deuda.estado:
+                lineas.append(f'Estado: {etiquetas[antes]} → {etiquetas[deuda.estado]}')
+            if lineas:
+                cuerpos[deuda.id] = ' · '.join(lineas)
+        if cuerpos:
+            deudas.browse(list(cuerpos))._message_log_batch(bodies=cuerpos)
+
+    @api.model
+    def _cron_marcar_vencidas(self):
+        """Pasa a 'vencida' todas las deudas pendientes cuya fecha ya pasó.
+
+        ``estado`` es almacenado y solo se recalcula cuando cambia la deuda, así
+        que el paso del tiempo se aplica aquí con un único UPDATE y un único
+        lote de mensajes en el chatter.
+        """
+        self.flush_model(['estado', 'fecha_estimada_pago'])
+        self.env.cr.execute("""
+            UPDATE ventas_deuda
+               SET estado = 'vencida',
+                   write_uid = %s,
+                   write_date = (NOW() AT TIME ZONE 'UTC')
+             WHERE estado = 'pendiente'
+               AND fecha_estimada_pago < %s
+         RETURNING id, producto_id
+        """, (self.env.uid, fields.Date.context_today(self)))
+        filas = self.env.cr.fetchall()
+        if not filas:
+            return
+        ids = [deuda_id for deuda_id, _producto_id in filas]
+        pendientes = defaultdict(lambda: defaultdict(float))
+        for _deuda_id, producto_id in filas:
+            pendientes[producto_id]['total_deudas_pendientes'] -= 1
+        vencidas = self.browse(ids)
+        vencidas.invalidate_recordset(['estado', 'write_uid', 'write_date'])
+        # El UPDATE no pasa por el ORM: se marcan para recalcular los campos
+        # almacenados que dependen del estado (contadores de la persona), y el
+        # producto descuenta sus deudas pendientes
+        vencidas.modified(['estado'])
+        self.env['ventas.producto']._aplicar_deltas(pendientes)
+        vencidas.viaje_id._cambiar_version_resumen()
+        self.env['ventas.agregacion']._cambiar_version('deudas')
+        _logger.info('%s deudas marcadas como vencidas', len(ids))
+        if self._politica_seguimiento() == 'apagado':
+            return
+        vencidas._message_log_batch(
+            bodies={deuda_id: 'Estado: Pendiente → Vencida' for deuda_id in ids}
+        )
+
     @api.depends('fecha_estimada_pago')
     def _compute_dias_vencimiento(self):
         hoy = date.today()
@@ -347,6 +258,110 @@ class Deuda(models.Model):
             else:
                 deuda.dias_vencimiento = 0
     
+    def _deltas_viaje(self, signo=1):
+        """Aporte firmado de estas deudas (y sus pagos) a los totales de sus viajes"""
+        deltas = defaultdict(lambda: defaultdict(float))
+        for deuda in self:
+            delta = deltas[deuda.viaje_id.id]
+            delta['total_deuda'] += signo * deuda.monto_pendiente
+            for pago in deuda.pagos_ids:
+                delta['total_' + pago.tipo_pago] += signo * pago.monto
+        return deltas
+
+    def _deltas_producto(self, signo=1):
+        """Aporte firmado de estas deudas al contador de deudas pendientes de sus productos"""
+        deltas = defaultdict(lambda: defaultdict(float))
+        for deuda in self.filtered(lambda d: d.estado == 'pendiente'):
+            deltas[deuda.producto_id.id]['total_deudas_pendientes'] += signo
+        return deltas
+
+    def _cantidades_stock(self, signo=1):
+        """Unidades firmadas que estas deudas toman de cada producto del viaje"""
+        cantidades = defaultdict(int)
+        for deuda in self:
+            cantidades[deuda.viaje_producto_id.id] += signo * deuda.cantidad
+        return cantidades
+
+    @api.model
+    def _completar_precio(self, vals):
+        """Toma el precio vigente del producto si no viene en ``vals``"""
+        if vals.get('viaje_producto_id') and 'precio_unitario' not in vals:
+            viaje_producto = self.env['ventas.viaje.producto'].browse(vals['viaje_producto_id'])
+            vals['precio_unitario'] = viaje_producto.precio_venta
+        return vals
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_list = [self._completar_precio(dict(vals)) for vals in vals_list]
+        politica = self._politica_seguimiento()
+        contexto = {'ventas_omitir_deltas': True}
+        if politica != 'completo':
+            # Sin mensaje de creación, seguidores ni valores seguidos por deuda
+            contexto['tracking_disable'] = True
+        deudas = super(Deuda, self.with_context(**contexto)).create(vals_list)
+        if politica == 'resumen':
+            deudas._message_log_batch(bodies=dict.fromkeys(deudas.ids, 'Deuda creada'))
+        self.env['ventas.viaje.producto']._reservar(deudas._cantidades_stock())
+        self.env['ventas.viaje']._aplicar_deltas(deudas._deltas_viaje())
+        self.env['ventas.producto']._aplicar_deltas(deudas._deltas_producto())
+        self.env['ventas.persona']._diferir_agregados(deudas.persona_id)
+        self.env['ventas.agregacion']._cambiar_version('deudas')
+        return deudas.with_env(self.env)
+
+    def write(self, vals):
+        vals = self._completar_precio(dict(vals))
+        personas = self.persona_id
+        productos_antes = self._deltas_producto(-1) if CAMPOS_ESTADO.intersection(vals) else None
+        if not CAMPOS_TOTALES_VIAJE.intersection(vals):
+            res = super().write(vals)
+            if 'fecha_estimada_pago' in vals:
+                # El estado (vencida o no) entra en el resumen del viaje
+                self.viaje_id._cambiar_version_resumen()
+        else:
+            antes = self._deltas_viaje(-1)
+            stock_antes = self._cantidades_stock(-1)
+            res = super(Deuda, self.with_context(ventas_omitir_deltas=True)).write(vals)
+            self.env['ventas.viaje.producto']._reservar(stock_antes, self._cantidades_stock())
+            self.env['ventas.viaje']._aplicar_deltas(antes, self._deltas_viaje())
+        if productos_antes is not None:
+            self.env['ventas.producto']._aplicar_deltas(productos_antes, self._deltas_producto())
+        self.env['ventas.persona']._diferir_agregados(personas | self.persona_id)
+        self.env['ventas.agregacion']._cambiar_version('deudas')
+        return res
+
+    def unlink(self):
+        # Los pagos se borran en cascada: su aporte y su dinero se descuentan aquí
+        deltas = self._deltas_viaje(-1)
+        productos = self._deltas_producto(-1)
+        stock = self._cantidades_stock(-1)
+        caja = self.pagos_ids._importes_caja()
+        self.env['ventas.movimiento.caja']._desvincular('pago_id', self.pagos_ids.ids)
+        personas = self.persona_id
+        res = super().unlink()
+        self.env['ventas.persona']._diferir_agregados(personas.exists())
+        self.env['ventas.agregacion']._cambiar_version('deudas')
+        self.env['ventas.viaje.producto']._reservar(stock)
+        self.env['ventas.viaje']._aplicar_deltas(deltas)
+        self.env['ventas.producto']._aplicar_deltas(productos)
+        self.env['ventas.movimiento.caja']._registrar_cambios('pago_id', caja, {})
+        return res
+
+    def action_repreciar(self):
+        """Lleva las deudas abiertas seleccionadas al precio de venta vigente.
+
+        Se omiten las deudas pagadas y las que quedarían por debajo de lo ya
+        pagado. Se hace un único write por precio nuevo.
+        """
+        por_precio = defaultdict(lambda: self.browse())
+        for deuda in self.filtered(lambda d: d.estado != 'pagado'):
+            precio = deuda.viaje_producto_id.precio_venta
+            if precio == deuda.precio_unitario or deuda.cantidad * precio < deuda.total_pagado:
+                continue
+            por_precio[precio] |= deuda
+        for precio, deudas in por_precio.items():
+            deudas.write({'precio_unitario': precio})
+        return True
+
     def action_registrar_pago(self):
         self.ensure_one()
         return {
@@ -0,0 +1,217 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+TIPOS_PAGO = [
+    ('efectivo', 'Efectivo'),
+    ('transferencia', 'Transferencia'),
+]
+
+
+class MovimientoCaja(models.Model):
+    _name = 'ventas.movimiento.caja'
+    _description = 'Movimiento de Caja'
+    _order = 'fecha desc, id desc'
+    _rec_name = 'concepto'
+
+    fecha = fields.Datetime(
+        string='Fecha',
+        default=fields.Datetime.now,
+        required=True,
+        readonly=True
+    )
+    tipo_pago = fields.Selection(TIPOS_PAGO, string='Tipo de Pago', required=True, readonly=True)
+    monto = fields.Float(string='Monto', required=True, readonly=True)
+    saldo = fields.Float(
+        string='Saldo',
+        readonly=True,
+        help='Saldo acumulado del tipo de pago después de este movimiento'
+    )
+    concepto = fields.Char(string='Concepto', readonly=True)
+    viaje_id = fields.Many2one(
+        'ventas.viaje',
+        string='Viaje',
+        readonly=True,
+        index=True,
+        ondelete='set null'
+    )
+    venta_id = fields.Many2one(
+        'ventas.venta',
+        string='Venta',
+        readonly=True,
+        index='btree_not_null',
+        ondelete='set null'
+    )
+    pago_id = fields.Many2one(
+        'ventas.pago.deuda',
+        string='Pago de Deuda',
+        readonly=True,
+        index='btree_not_null',
+        ondelete='set null'
+    )
+
+    def _auto_init(self):
+        res = super()._auto_init()
+        # Con ventas o pagos particionados la clave primaria es (id, fecha) y
+        # no admite claves externas hacia el id: no se registran, y el
+        # ``ondelete`` lo hace ``_desvincular``
+        Particion = self.env['ventas.particion']
+        for campo in ('venta_id', 'pago_id'):
+            comodelo = self.env[self._fields[campo].comodel_name]
+            if Particion._es_particionada(comodelo._table):
+                self.pool._foreign_keys.pop((self._table, campo), None)
+        return res
+
+    def init(self):
+        # Saldo a una fecha: último movimiento del tipo de pago hasta esa fecha
+        self.env.cr.execute("DROP INDEX IF EXISTS ventas_movimiento_caja_tipo_fecha_monto_idx")
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS ventas_movimiento_caja_tipo_fecha_idx
+                ON ventas_movimiento_caja (tipo_pago, fecha, id)
+        """)
+        # Una fila por tipo de pago con su saldo total: actualizarla serializa
+        # las altas de ese tipo
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS ventas_movimiento_caja_saldo (
+                tipo_pago VARCHAR PRIMARY KEY,
+                saldo NUMERIC NOT NULL DEFAULT 0
+            )
+        """)
+        self.env.cr.execute("""
+            INSERT INTO ventas_movimiento_caja_saldo (tipo_pago, saldo)
+            SELECT t.tipo_pago, COALESCE(SUM(m.monto), 0)
+              FROM unnest(%s::varchar[]) AS t(tipo_pago)
+              LEFT JOIN ventas_movimiento_caja m ON m.tipo_pago = t.tipo_pago
+             GROUP BY t.tipo_pago
+                ON CONFLICT (tipo_pago) DO NOTHING
+        """, ([tipo for tipo, _nombre in TIPOS_PAGO],))
+
+    @api.model
+    def _registrar(self, movimientos):
+        """Agrega movimientos al libro y actualiza los saldos acumulados.
+
+        ``movimientos`` es una lista de diccionarios con al menos ``tipo_pago``
+        y ``monto``; sin ``fecha`` se registran ahora. Cada tipo de pago
+        afectado actualiza primero su fila de saldo: las altas del mismo tipo
+        se esperan, y si otra transacción la cambió después de empezar esta,
+        PostgreSQL lanza un error de serialización y Odoo reintenta la
+        petición con una foto que ya incluye esos movimientos.
+        """
+        movimientos = [mov for mov in movimientos if mov.get('monto')]
+        if not movimientos:
+            return self.browse()
+        ahora = fields.Datetime.now()
+        desde = {}
+        for mov in movimientos:
+            mov['fecha'] = mov.get('fecha') or ahora
+            tipo = mov['tipo_pago']
+            desde[tipo] = min(desde.get(tipo, mov['fecha']), mov['fecha'])
+        self.flush_model()
+        for tipo in sorted(desde):
+            self.env.cr.execute("""
+                UPDATE ventas_movimiento_caja_saldo SET saldo = saldo + %s WHERE tipo_pago = %s
+            """, (sum(mov['monto'] for mov in movimientos if mov['tipo_pago'] == tipo), tipo))
+        nuevos = self.sudo().create(movimientos)
+        nuevos.flush_recordset()
+        # Los saldos se rehacen desde la fecha más antigua de las altas: con
+        # fecha de ahora solo son las filas nuevas; una venta sincronizada o
+        # importada con fecha pasada mueve también las posteriores
+        for tipo, fecha in sorted(desde.items()):
+            self.env.cr.execute("""
+                UPDATE ventas_movimiento_caja m
+                   SET saldo = COALESCE((SELECT p.saldo
+                                           FROM ventas_movimiento_caja p
+                                          WHERE p.tipo_pago = %(tipo)s
+                                            AND p.fecha < %(fecha)s
+                                          ORDER BY p.fecha DESC, p.id DESC
+                                          LIMIT 1), 0) + a.acumulado
+                  FROM (SELECT id, SUM(monto) OVER (ORDER BY fecha, id) AS acumulado
+                          FROM ventas_movimiento_caja
+                         WHERE tipo_pago = %(tipo)s
+                           AND fecha >= %(fecha)s) a
+                 WHERE m.id = a.id
+            """, {'tipo': tipo, 'fecha': fecha})
+        self.invalidate_model(['saldo'])
+        return nuevos
+
+    @api.model
+    def _registrar_altas(self, campo, importes):
+        """Registra el dinero de ventas o pagos nuevos ``{id: importe}``, a la fecha de cada uno"""
+        return self._registrar([
+            dict(importe, **{campo: res_id}) for res_id, importe in sorted(importes.items())
+        ])
+
+    @api.model
+    def _registrar_cambios(self, campo, antes, despues):
+        """Registra las diferencias entre dos fotos ``{id: importe}`` de ventas o pagos.
+
+        ``campo`` es ``venta_id`` o ``pago_id``. Un importe que desaparece o
+        cambia genera su reversa; uno nuevo o cambiado genera su alta. Ambas
+        quedan a la fecha del cambio, no a la de la venta o el pago: el saldo
+        de los días anteriores no se reescribe.
+        """
+        ahora = fields.Datetime.now()
+        movimientos = []
+        for res_id in sorted(antes.keys() | despues.keys()):
+            previo, actual = antes.get(res_id), despues.get(res_id)
+            if previo and actual and dict(previo, fecha=None) == dict(actual, fecha=None):
+                continue
+            if previo:
+                movimientos.append(dict(
+                    previo,
+                    fecha=ahora,
+                    monto=-previo['monto'],
+                    concepto='Reversa: ' + previo['concepto'],
+                    **{campo: res_id if res_id in despues else False}
+                ))
+            if actual:
+                movimientos.append(dict(actual, fecha=ahora, **{campo: res_id}))
+        return self._registrar(movimientos)
+
+    @api.model
+    def _desvincular(self, campo, ids):
+        """Suelta los movimientos de las ventas o pagos que se van a borrar.
+
+        Equivale al ``ondelete='set null'`` de la clave externa, que no existe
+        cuando la tabla de ventas o de pagos está particionada.
+        """
+        if ids:
+            self.env.cr.execute(
+                f'UPDATE ventas_movimiento_caja SET {campo} = NULL WHERE {campo} = ANY(%s)',
+                (list(ids),),
+            )
+            self.invalidate_model([campo])
+
+    @api.model
+    def _ultimos_saldos(self, tipos, hasta=None):
+        """``{tipo_pago: saldo}`` del último movimiento de cada tipo (hasta ``hasta``)"""
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT t.tipo_pago,
+                   (SELECT m.saldo
+                      FROM ventas_movimiento_caja m
+                     WHERE m.tipo_pago = t.tipo_pago
+                       AND (%s::timestamp IS NULL OR m.fecha <= %s::timestamp)
+                     ORDER BY m.fecha DESC, m.id DESC
+                     LIMIT 1)
+              FROM unnest(%s::varchar[]) AS t(tipo_pago)
+        """, (hasta, hasta, list(tipos)))
+        return {tipo: saldo or 0.0 for tipo, saldo in self.env.cr.fetchall()}
+
+    @api.model
+    def saldo_a_fecha(self, fecha, tipo_pago=None):
+        """Dinero en mano a ``fecha``, por tipo de pago"""
+        tipos = [tipo_pago] if tipo_pago else [tipo for tipo, _nombre in TIPOS_PAGO]
+        return self._ultimos_saldos(tipos, hasta=fecha)
+
+    @api.model
+    def totales_periodo(self, desde, hasta):
+        """Movimiento neto entre dos fechas, por tipo de pago"""
+        inicio = self.saldo_a_fecha(desde)
+        fin = self.saldo_a_fecha(hasta)
+        return {tipo: fin[tipo] - inicio[tipo] for tipo in fin}
+
+    def write(self, vals):
+        raise UserError('Los movimientos de caja no se pueden modificar; registre una reversa')
+
+    def unlink(self):
+        raise UserError('Los movimientos de caja no se pueden eliminar; registre una reversa')
@@ -14,9 +14,12 @@ class PagoDeuda(models.Model):
     fecha_pago = fields.Datetime(
         string='Fecha de Pago',
         default=fields.Datetime.now,
-        required=True
+        required=True,
+        index=True
     )
     monto = fields.Float(string='Monto', required=True)
+    # Clave generada por el dispositivo que registró el pago sin conexión
+    clave_sincronizacion = fields.Char(string='Clave de Sincronización', readonly=True, copy=False)
     tipo_pago = fields.Selection([
         ('efectivo', 'Efectivo'),
         ('transferencia', 'Transferencia')
@@ -27,10 +30,125 @@ class PagoDeuda(models.Model):
         'ventas.persona',
         string='Persona',
         related='deuda_id.persona_id',
-        store=True
+        store=True,
+        index=True
+    )
+    viaje_id = fields.Many2one(
+        'ventas.viaje',
+        string='Viaje',
+        related='deuda_id.viaje_id',
+        store=True,
+        index=True
     )
     
     
+    def _auto_init(self):
+        if self.env['ventas.particion']._es_particionada(self._table):
+            return self.env['ventas.particion']._agregar_columnas(self)
+        return super()._auto_init()
+
+    def init(self):
+        # La versión del resumen financiero ya no se lee de write_date
+        self.env.cr.execute("DROP INDEX IF EXISTS ventas_pago_deuda_viaje_write_date_idx")
+        # Índices de una columna que ya cubre la primera columna de los compuestos
+        self.env.cr.execute("DROP INDEX IF EXISTS ventas_pago_deuda__deuda_id_index")
+        # Pagos de una deuda por tipo de pago (totales de deuda y viaje)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS ventas_pago_deuda_deuda_tipo_pago_idx
+                ON ventas_pago_deuda (deuda_id, tipo_pago)
+        """)
+        # Reenviar un lote sincronizado no duplica pagos
+        columnas = 'clave_sincronizacion'
+        if self.env['ventas.particion']._es_particionada(self._table):
+            columnas += ', fecha_pago'
+        self.env.cr.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS ventas_pago_deuda_clave_sincronizacion_uniq
+                ON ventas_pago_deuda ({columnas})
+             WHERE clave_sincronizacion IS NOT NULL
+        """)
+
+    def _importes_caja(self):
+        """``{pago_id: movimiento}`` del dinero que entra por estos pagos, a su fecha"""
+        return {
+            pago.id: {
+                'fecha': pago.fecha_pago,
+                'tipo_pago': pago.tipo_pago,
+                'monto': pago.monto,
+                'viaje_id': pago.deuda_id.viaje_id.id,
+                'concepto': f'Pago {pago.deuda_id.display_name}',
+            }
+            for pago in self
+        }
+
+    def _detalles_seguimiento(self, prefijo):
+        """``{deuda_id: [texto]}`` con una línea por pago para el chatter resumido"""
+        etiquetas = dict(self._fields['tipo_pago'].selection)
+        detalles = {}
+        for pago in self:
+            detalles.setdefault(pago.deuda_id.id, []).append(
+                f'{prefijo} {pago.monto:.2f} ({etiquetas.get(pago.tipo_pago, pago.tipo_pago)})'
+            )
+        return detalles
+
+    def _deudas_afectadas(self, vals=None):
+        deudas = self.deuda_id
+        if vals and vals.get('deuda_id'):
+            deudas |= self.env['ventas.deuda'].browse(vals['deuda_id'])
+        return deudas
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        deudas = self.env['ventas.deuda'].browse(
+            {vals['deuda_id'] for vals in vals_list if vals.get('deuda_id')}
+        )
+        antes = deudas._deltas_viaje(-1)
+        productos_antes = deudas._deltas_producto(-1)
+        estados = {deuda.id: deuda.estado for deuda in deudas}
+        pagos = super(PagoDeuda, self.with_context(ventas_omitir_deltas=True)).create(vals_list)
+        deudas._seguimiento_pagos(estados, pagos._detalles_seguimiento('Pago'))
+        self.env['ventas.viaje']._aplicar_deltas(antes, deudas._deltas_viaje())
+        self.env['ventas.producto']._aplicar_deltas(productos_antes, deudas._deltas_producto())
+        self.env['ventas.persona']._diferir_agregados(deudas.persona_id)
+        self.env['ventas.agregacion']._cambiar_version('deudas')
+        self.env['ventas.movimiento.caja']._registrar_altas('pago_id', pagos._importes_caja())
+        return pagos.with_env(self.env)
+
+    def write(self, vals):
+        if not {'deuda_id', 'monto', 'tipo_pago'}.intersection(vals):
+            return super().write(vals)
+        deudas = self._deudas_afectadas(vals)
+        antes = deudas._deltas_viaje(-1)
+        productos_antes = deudas._deltas_producto(-1)
+        caja_antes = self._importes_caja()
+        estados = {deuda.id: deuda.estado for deuda in deudas}
+        res = super(PagoDeuda, self.with_context(ventas_omitir_deltas=True)).write(vals)
+        deudas._seguimiento_pagos(estados, self._detalles_seguimiento('Pago modificado:'))
+        self.env['ventas.viaje']._aplicar_deltas(antes, deudas._deltas_viaje())
+        self.env['ventas.producto']._aplicar_deltas(productos_antes, deudas._deltas_producto())
+        self.env['ventas.persona']._diferir_agregados(deudas.persona_id)
+        self.env['ventas.agregacion']._cambiar_version('deudas')
+        self.env['ventas.movimiento.caja']._registrar_cambios(
+            'pago_id', caja_antes, self._importes_caja()
+        )
+        return res
+
+    def unlink(self):
+        deudas = self._deudas_afectadas()
+        antes = deudas._deltas_viaje(-1)
+        productos_antes = deudas._deltas_producto(-1)
+        caja = self._importes_caja()
+        estados = {deuda.id: deuda.estado for deuda in deudas}
+        detalles = self._detalles_seguimiento('Pago eliminado:')
+        self.env['ventas.movimiento.caja']._desvincular('pago_id', self.ids)
+        res = super().unlink()
+        deudas._seguimiento_pagos(estados, detalles)
+        self.env['ventas.viaje']._aplicar_deltas(antes, deudas.exists()._deltas_viaje())
+        self.env['ventas.producto']._aplicar_deltas(productos_antes, deudas.exists()._deltas_producto())
+        self.env['ventas.persona']._diferir_agregados(deudas.exists().persona_id)
+        self.env['ventas.agregacion']._cambiar_version('deudas')
+        self.env['ventas.movimiento.caja']._registrar_cambios('pago_id', caja, {})
+        return res
+
     # Restricción
     _sql_constraints = [
         ('monto_positivo', 'CHECK(monto > 0)', 'El monto debe ser positivo'),
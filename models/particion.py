@@ -0,0 +1,150 @@
+import logging
+import re
+
+from odoo import models, fields, api, tools
+
+_logger = logging.getLogger(__name__)
+
+# Tablas que pueden particionarse por año y su columna de fecha
+TABLAS = {
+    'ventas_venta': 'fecha_venta',
+    'ventas_pago_deuda': 'fecha_pago',
+}
+
+
+class Particion(models.AbstractModel):
+    _name = 'ventas.particion'
+    _description = 'Particionado por Año de Ventas y Pagos'
+
+    @api.model
+    def _es_particionada(self, tabla):
+        self.env.cr.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (tabla,))
+        fila = self.env.cr.fetchone()
+        return bool(fila) and fila[0] == 'p'
+
+    @api.model
+    def _particionar_si_configurado(self):
+        """Particiona al instalar o migrar si el servidor tiene ``ventas_particionar = True``"""
+        if tools.config.get('ventas_particionar') in (True, '1', 'True', 'true'):
+            self.particionar()
+
+    @api.model
+    def particionar(self):
+        """Convierte las tablas de ventas y pagos en tablas particionadas por año.
+
+        Es una operación de mantenimiento: bloquea las tablas mientras copia
+        los datos. Las tablas ya particionadas se dejan como están.
+        """
+        self.env.flush_all()
+        for tabla, columna in TABLAS.items():
+            if not self._es_particionada(tabla):
+                self._convertir(tabla, columna)
+        self.env.invalidate_all()
+        return True
+
+    def _convertir(self, tabla, columna):
+        cr = self.env.cr
+        antigua = f'{tabla}_sin_particion'
+        cr.execute(f'LOCK TABLE {tabla} IN ACCESS EXCLUSIVE MODE')
+
+        # Restricciones, índices y claves externas entrantes de la tabla actual
+        cr.execute("""
+            SELECT conname, pg_get_constraintdef(oid)
+              FROM pg_constraint
+             WHERE conrelid = %s::regclass AND contype IN ('c', 'f')
+        """, (tabla,))
+        restricciones = cr.fetchall()
+        cr.execute("""
+            SELECT indexname, indexdef
+              FROM pg_indexes
+             WHERE schemaname = current_schema AND tablename = %s AND indexname != %s
+        """, (tabla, f'{tabla}_pkey'))
+        indices = cr.fetchall()
+        cr.execute("""
+            SELECT conrelid::regclass::text, conname
+              FROM pg_constraint
+             WHERE confrelid = %s::regclass AND contype = 'f'
+        """, (tabla,))
+        entrantes = cr.fetchall()
+        for tabla_origen, nombre in entrantes:
+            # Una tabla particionada no admite claves externas hacia su id solo
+            _logger.info('Particionado: se quita la clave externa %s de %s', nombre, tabla_origen)
+            cr.execute(f'ALTER TABLE {tabla_origen} DROP CONSTRAINT {nombre}')
+
+        # La columna de partición forma parte de la clave primaria
+        cr.execute(f'UPDATE {tabla} SET {columna} = create_date WHERE {columna} IS NULL')
+        cr.execute(f'ALTER SEQUENCE {tabla}_id_seq OWNED BY NONE')
+        cr.execute(f'ALTER TABLE {tabla} RENAME TO {antigua}')
+        cr.execute(f"""
+            CREATE TABLE {tabla} (LIKE {antigua} INCLUDING DEFAULTS INCLUDING STORAGE INCLUDING COMMENTS)
+                PARTITION BY RANGE ({columna})
+        """)
+        cr.execute(f'ALTER TABLE {tabla} ALTER COLUMN {columna} SET NOT NULL')
+        cr.execute(f'ALTER TABLE {tabla} ADD CONSTRAINT {tabla}_pkey PRIMARY KEY (id, {columna})')
+        cr.execute(f'CREATE TABLE {tabla}_default PARTITION OF {tabla} DEFAULT')
+
+        cr.execute(f"SELECT MIN({columna}), MAX({columna}) FROM {antigua}")
+        minimo, maximo = cr.fetchone()
+        hoy = fields.Date.today()
+        desde = (minimo or hoy).year
+        hasta = max((maximo or hoy).year, hoy.year) + 1
+        for anio in range(desde, hasta + 1):
+            self._crear_particion(tabla, columna, anio)
+
+        cr.execute(f'INSERT INTO {tabla} SELECT * FROM {antigua}')
+        cr.execute(f'DROP TABLE {antigua}')
+        cr.execute(f'ALTER SEQUENCE {tabla}_id_seq OWNED BY {tabla}.id')
+
+        for nombre, definicion in restricciones:
+            cr.execute(f'ALTER TABLE {tabla} ADD CONSTRAINT {nombre} {definicion}')
+        for nombre, definicion in indices:
+            if ' UNIQUE ' in definicion and columna not in definicion:
+                # Los índices únicos deben incluir la columna de partición
+                definicion = re.sub(r'\(([^()]*)\)', rf'(\1, {columna})', definicion, count=1)
+            # Se crea en la tabla padre y PostgreSQL lo replica en cada partición
+            cr.execute(definicion)
+        cr.execute(f'ANALYZE {tabla}')
+        _logger.info('Particionado: %s convertida en particiones anuales de %s a %s', tabla, desde, hasta)
+
+    def _crear_particion(self, tabla, columna, anio):
+        """Crea la partición de ``anio`` moviendo a ella las filas de la partición por defecto"""
+        cr = self.env.cr
+        particion = f'{tabla}_{anio}'
+        cr.execute("SELECT to_regclass(%s)", (particion,))
+        if cr.fetchone()[0]:
+            return
+        inicio, fin = f'{anio}-01-01', f'{anio + 1}-01-01'
+        cr.execute(f'CREATE TABLE {particion} (LIKE {tabla} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cr.execute(f"""
+            WITH movidas AS (
+                DELETE FROM {tabla}_default
+                 WHERE {columna} >= %s AND {columna} < %s
+             RETURNING *
+            )
+            INSERT INTO {particion} SELECT * FROM movidas
+        """, (inicio, fin))
+        cr.execute(f"ALTER TABLE {tabla} ATTACH PARTITION {particion} FOR VALUES FROM (%s) TO (%s)", (inicio, fin))
+
+    @api.model
+    def _cron_particiones(self):
+        """Mantiene creadas las particiones del año en curso y del siguiente"""
+        anio = fields.Date.today().year
+        for tabla, columna in TABLAS.items():
+            if self._es_particionada(tabla):
+                for siguiente in (anio, anio + 1):
+                    self._crear_particion(tabla, columna, siguiente)
+
+    @api.model
+    def _agregar_columnas(self, modelo):
+        """Crea en la tabla particionada las columnas de campos nuevos.
+
+        El ORM solo reconoce tablas normales: sobre una particionada no
+        ejecuta su ``_auto_init`` y las columnas nuevas se añaden aquí.
+        """
+        cr = self.env.cr
+        existentes = tools.sql.table_columns(cr, modelo._table)
+        for nombre, campo in modelo._fields.items():
+            if campo.store and campo.column_type and nombre not in existentes:
+                cr.execute(f'ALTER TABLE {modelo._table} ADD COLUMN "{nombre}" {campo.column_type[1]}')
+                if campo.compute:
+                    self.env.add_to_compute(campo, modelo.with_context(active_test=False).search([]))
@@ -1,5 +1,18 @@
+from markupsafe import escape
+
 from odoo import models, fields, api
 
+# Deudas abiertas que se muestran como tags en la tarjeta de la persona
+TAGS_MAX = 5
+
+# Agregados que en modo diferido se recalculan por cron y no en cada cambio
+CAMPOS_DIFERIDOS = (
+    'total_deuda_pendiente',
+    'total_deudas',
+    'deudas_tags_text',
+    'deudas_abiertas_count',
+)
+
 class Persona(models.Model):
     _name = 'ventas.persona'
     _description = 'Persona'
@@ -29,37 +42,133 @@ class Persona(models.Model):
 
     total_deudas = fields.Float(
         string='Total Deudas',
-        compute='_compute_total_compras',
+        compute='_compute_total_deuda',
         store=True
     )
     
     @api.depends('deudas_ids.monto_pendiente','deudas_ids.monto_total')
     def _compute_total_deuda(self):
+        reales = self.filtered('id')
+        deudas = self.env['ventas.agregacion']._sumar(
+            'ventas.deuda', [('persona_id', 'in', reales.ids)],
+            ['persona_id'], ['monto_pendiente:sum', 'monto_total:sum'],
+        )
+        for persona in self:
+            if not persona.id:
+                persona.total_deuda_pendiente = sum(persona.deudas_ids.mapped('monto_pendiente'))
+                persona.total_deudas = sum(persona.deudas_ids.mapped('monto_total'))
+                continue
+            persona.total_deuda_pendiente = deudas[persona.id]['monto_pendiente:sum']
+            persona.total_deudas = deudas[persona.id]['monto_total:sum']
+
+    # Antigüedad de lo pendiente, leída del resumen en caché del reporte
+    deuda_al_dia = fields.Float(string='Al Día', compute='_compute_antiguedad')
+    deuda_1_30 = fields.Float(string='1-30 días', compute='_compute_antiguedad')
+    deuda_31_60 = fields.Float(string='31-60 días', compute='_compute_antiguedad')
+    deuda_61_90 = fields.Float(string='61-90 días', compute='_compute_antiguedad')
+    deuda_mas_90 = fields.Float(string='Más de 90 días', compute='_compute_antiguedad')
+
+    def _compute_antiguedad(self):
+        resumen = self.env['ventas.reporte.antiguedad'].resumen('persona_id', self.filtered('id').ids)
         for persona in self:
-            persona.total_deuda_pendiente = sum(
-                persona.deudas_ids.mapped('monto_pendiente')
-            )
-            persona.total_deudas = sum(
-                persona.deudas_ids.mapped('monto_total')
-            )
+            tramos = resumen.get(persona.id, {})
+            persona.deuda_al_dia = tramos.get('corriente', 0.0)
+            persona.deuda_1_30 = tramos.get('1_30', 0.0)
+            persona.deuda_31_60 = tramos.get('31_60', 0.0)
+            persona.deuda_61_90 = tramos.get('61_90', 0.0)
+            persona.deuda_mas_90 = tramos.get('mas_90', 0.0)
 
     deudas_tags_text = fields.Html(
     compute='_compute_deudas_tags_text',
     string="Deudas como Tags",
-    sanitize=False
+    sanitize=False,
+    store=True
+    )
+    deudas_abiertas_count = fields.Integer(
+        string='Deudas Abiertas',
+        compute='_compute_deudas_tags_text',
+        store=True
     )
 
+    @api.depends('deudas_ids.estado', 'deudas_ids.display_name',
+                 'deudas_ids.fecha_estimada_pago', 'deudas_ids.producto_id.nombre')
     def _compute_deudas_tags_text(self):
+        """Tags de las deudas abiertas, las TAGS_MAX más próximas a vencer.
+
+        Se guardan en la persona y solo se recalculan cuando cambia una de sus
+        deudas; para todo el lote se hace una única consulta.
+        """
+        abiertas = self._deudas_abiertas_por_persona(self.filtered('id').ids)
         for record in self:
-            tags = []
-            for deuda in record.deudas_ids:
+            if record.id:
+                filas, total = abiertas.get(record.id, ([], 0))
+            else:
+                deudas = record.deudas_ids.filtered(lambda d: d.estado != 'pagado')
+                filas = [
+                    (d.estado, d.viaje_id.nombre, d.producto_id.nombre, d.cantidad, d.monto_total)
+                    for d in deudas[:TAGS_MAX]
+                ]
+                total = len(deudas)
+            tags = [
                 # Crear HTML que parezca tags
-                color = self._get_color_by_estado(deuda.estado)
-                tag = f'<span class="badge bg-{color} me-1 text-white">{deuda.display_name_para_personas}</span>'
-                tags.append(tag)
-        
+                '<span class="badge bg-%s me-1 text-white">%s</span>' % (
+                    self._get_color_by_estado(estado),
+                    escape(f"{viaje or 'Sin Viaje'} - {producto or ''} - {cantidad} - ${monto_total}"),
+                )
+                for estado, viaje, producto, cantidad, monto_total in filas
+            ]
+            if total > len(filas):
+                tags.append(f'<span class="badge bg-secondary me-1">+{total - len(filas)} más</span>')
             record.deudas_tags_text = ''.join(tags) if tags else "Sin deudas"
+            record.deudas_abiertas_count = total
+
+    def _deudas_abiertas_por_persona(self, persona_ids):
+        """``{persona_id: ([(estado, viaje, producto, cantidad, monto_total)], total)}``"""
+        if not persona_ids:
+            return {}
+        self.env['ventas.deuda'].flush_model()
+        self.env['ventas.viaje'].flush_model(['nombre'])
+        self.env['ventas.producto'].flush_model(['nombre'])
+        self.env.cr.execute("""
+            SELECT persona_id, estado, viaje, producto, cantidad, monto_total, total
+              FROM (
+                    SELECT d.persona_id, d.estado, v.nombre AS viaje, p.nombre AS producto,
+                           d.cantidad, d.monto_total,
+                           row_number() OVER (
+                               PARTITION BY d.persona_id
+                               ORDER BY d.fecha_estimada_pago NULLS LAST, d.id
+                           ) AS orden,
+                           count(*) OVER (PARTITION BY d.persona_id) AS total
+                      FROM ventas_deuda d
+                      LEFT JOIN ventas_viaje v ON v.id = d.viaje_id
+                      LEFT JOIN ventas_producto p ON p.id = d.producto_id
+                     WHERE d.persona_id = ANY(%s)
+                       AND d.estado != 'pagado'
+                   ) abiertas
+             WHERE orden <= %s
+             ORDER BY persona_id, orden
+        """, (list(persona_ids), TAGS_MAX))
+        resultado = {}
+        for persona_id, estado, viaje, producto, cantidad, monto_total, total in self.env.cr.fetchall():
+            filas, _total = resultado.setdefault(persona_id, ([], total))
+            filas.append((estado, viaje, producto, cantidad, monto_total))
+        return resultado
     
+    @api.model
+    def _diferir_agregados(self, personas):
+        """En modo diferido, saca a ``personas`` del recálculo inmediato y las encola"""
+        cola = self.env['ventas.recalculo.pendiente']
+        if not personas or not cola._activo():
+            return
+        for campo in CAMPOS_DIFERIDOS:
+            self.env.remove_to_compute(self._fields[campo], personas)
+        cola._encolar(self._name, personas.ids)
+
+    def _recalcular_diferido(self):
+        for campo in CAMPOS_DIFERIDOS:
+            self.env.add_to_compute(self._fields[campo], self)
+        self._recompute_recordset(list(CAMPOS_DIFERIDOS))
+
     def _get_color_by_estado(self, estado):
         colores = {
             'pagado': 'success',
@@ -68,4 +177,18 @@ class Persona(models.Model):
             'parcial': 'info'
         }
         return colores.get(estado, 'secondary')
-   
\ No newline at end of file
+   
+    def action_pagar(self):
+        """Abrir el asistente para repartir un pago entre las deudas abiertas"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Registrar Pago',
+            'res_model': 'ventas.pago.persona',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {
+                'default_persona_id': self.id,
+                'default_monto': self.total_deuda_pendiente,
+            }
+        }
@@ -1,5 +1,10 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
 
+# Contadores que ventas y deudas actualizan con su delta firmado
+CAMPOS_DELTA = ('total_ventas', 'cantidad_vendida', 'ingresos_total', 'total_deudas_pendientes')
+
 class Producto(models.Model):
     _name = 'ventas.producto'
     _description = 'Producto'
@@ -28,25 +33,74 @@ class Producto(models.Model):
         string='Deudas con este producto'
     )
     
-    # Campos calculados para estadísticas rápidas
-    total_ventas = fields.Integer(
-        string='Total Vendido',
-        compute='_compute_totales_producto',
-        store=False
-    )
-    
-    total_deudas_pendientes = fields.Integer(
-        string='Deudas Pendientes',
-        compute='_compute_totales_producto',
-        store=False
-    )
-    
-    def _compute_totales_producto(self):
+    # Contadores para estadísticas rápidas: almacenados para poder buscar y
+    # ordenar, y mantenidos con el delta de cada venta o deuda
+    total_ventas = fields.Integer(string='Total Vendido', readonly=True, default=0)
+    total_deudas_pendientes = fields.Integer(string='Deudas Pendientes', readonly=True, default=0)
+    cantidad_vendida = fields.Integer(string='Unidades Vendidas', readonly=True, default=0)
+    ingresos_total = fields.Float(string='Ingresos', readonly=True, default=0.0)
+
+    @api.model
+    def _aplicar_deltas(self, *deltas):
+        """Suma a cada producto la variación firmada de sus contadores.
+
+        Cada delta es ``{producto_id: {campo: valor}}`` con campos de
+        ``CAMPOS_DELTA``. En modo diferido solo se encola el producto.
+        """
+        if self.env.context.get('ventas_omitir_deltas'):
+            return
+        acumulado = defaultdict(lambda: defaultdict(float))
+        for delta in deltas:
+            for producto_id, valores in delta.items():
+                for campo, valor in valores.items():
+                    acumulado[producto_id][campo] += valor
+        acumulado = {
+            producto_id: valores for producto_id, valores in acumulado.items()
+            if producto_id and any(valores.values())
+        }
+        if not acumulado:
+            return
+        cola = self.env['ventas.recalculo.pendiente']
+        if cola._activo():
+            cola._encolar(self._name, list(acumulado))
+            return
+        self.flush_model(list(CAMPOS_DELTA))
+        # En orden de id, para que dos ventas de los mismos productos no se bloqueen en cruz
+        for producto_id, valores in sorted(acumulado.items()):
+            self.env.cr.execute("""
+                UPDATE ventas_producto
+                   SET total_ventas = COALESCE(total_ventas, 0) + %(ventas)s,
+                       cantidad_vendida = COALESCE(cantidad_vendida, 0) + %(cantidad)s,
+                       ingresos_total = COALESCE(ingresos_total, 0) + %(ingresos)s,
+                       total_deudas_pendientes = COALESCE(total_deudas_pendientes, 0) + %(pendientes)s
+                 WHERE id = %(id)s
+            """, {
+                'id': producto_id,
+                'ventas': int(valores.get('total_ventas', 0)),
+                'cantidad': int(valores.get('cantidad_vendida', 0)),
+                'ingresos': valores.get('ingresos_total', 0.0),
+                'pendientes': int(valores.get('total_deudas_pendientes', 0)),
+            })
+        self.browse(list(acumulado)).invalidate_recordset(list(CAMPOS_DELTA))
+
+    def _recalcular_totales_producto(self):
+        """Reconstruye los contadores desde las ventas y deudas (reparación)"""
+        agregacion = self.env['ventas.agregacion']
+        ventas = agregacion._sumar(
+            'ventas.venta', [('producto_id', 'in', self.ids)],
+            ['producto_id'], ['__count', 'cantidad:sum', 'total:sum'],
+        )
+        deudas = agregacion._sumar(
+            'ventas.deuda', [('producto_id', 'in', self.ids), ('estado', '=', 'pendiente')],
+            ['producto_id'], ['__count'],
+        )
         for producto in self:
-            # Contar ventas
-            producto.total_ventas = len(producto.ventas_ids)
-            
-            # Contar deudas pendientes (filtrando por estado)
-            producto.total_deudas_pendientes = len(
-                producto.deudas_ids.filtered(lambda d: d.estado == 'pendiente')
-            )
\ No newline at end of file
+            producto.write({
+                'total_ventas': ventas[producto.id]['__count'],
+                'cantidad_vendida': ventas[producto.id]['cantidad:sum'],
+                'ingresos_total': ventas[producto.id]['total:sum'],
+                'total_deudas_pendientes': deudas[producto.id]['__count'],
+            })
+
+    def _recalcular_diferido(self):
+        self._recalcular_totales_producto()
@@ -0,0 +1,75 @@
+from collections import defaultdict
+import logging
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+
+class RecalculoPendiente(models.Model):
+    _name = 'ventas.recalculo.pendiente'
+    _description = 'Recálculo Pendiente de Totales'
+    _log_access = False
+
+    modelo = fields.Char(string='Modelo', required=True, readonly=True)
+    res_id = fields.Integer(string='Registro', required=True, readonly=True)
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS ventas_recalculo_pendiente_modelo_res_idx
+                ON ventas_recalculo_pendiente (modelo, res_id)
+        """)
+
+    @api.model
+    def _activo(self):
+        """Con el parámetro ``ventas.recalculo_diferido`` los totales se recalculan por cron"""
+        parametro = self.env['ir.config_parameter'].sudo().get_param('ventas.recalculo_diferido')
+        return parametro in ('1', 'True', 'true')
+
+    @api.model
+    def _encolar(self, modelo, ids):
+        """Marca ``ids`` de ``modelo`` como pendientes de recálculo.
+
+        Solo se insertan filas: sin claves únicas, dos transacciones que marcan
+        el mismo viaje no se esperan. Los duplicados se funden al procesar.
+        """
+        ids = sorted({res_id for res_id in ids if res_id})
+        if not ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO ventas_recalculo_pendiente (modelo, res_id)
+            SELECT %s, unnest(%s::int[])
+        """, (modelo, ids))
+
+    @api.model
+    def _procesar(self, modelo=None, ids=None):
+        """Recalcula una sola vez cada registro pendiente y vacía su cola.
+
+        Sin argumentos procesa toda la cola; con ``modelo`` e ``ids`` solo
+        esos registros (botón "Actualizar ahora").
+        """
+        condiciones, parametros = [], []
+        if modelo:
+            condiciones.append('modelo = %s')
+            parametros.append(modelo)
+        if ids is not None:
+            condiciones.append('res_id = ANY(%s)')
+            parametros.append(list(ids))
+        donde = ('WHERE ' + ' AND '.join(condiciones)) if condiciones else ''
+        self.env.cr.execute(
+            f'DELETE FROM ventas_recalculo_pendiente {donde} RETURNING modelo, res_id',
+            parametros,
+        )
+        pendientes = defaultdict(set)
+        for nombre, res_id in self.env.cr.fetchall():
+            pendientes[nombre].add(res_id)
+        for nombre, res_ids in pendientes.items():
+            self.env[nombre].browse(sorted(res_ids)).exists()._recalcular_diferido()
+        self.env.flush_all()
+        return {nombre: len(res_ids) for nombre, res_ids in pendientes.items()}
+
+    @api.model
+    def _cron_procesar(self):
+        procesados = self._procesar()
+        if procesados:
+            _logger.info('Recálculo diferido: %s', procesados)
@@ -0,0 +1,102 @@
+from odoo import models, fields, api, tools
+
+TRAMOS = [
+    ('corriente', 'Al Día'),
+    ('1_30', '1-30 días'),
+    ('31_60', '31-60 días'),
+    ('61_90', '61-90 días'),
+    ('mas_90', 'Más de 90 días'),
+]
+
+# Tramo según los días de atraso; el mismo CASE sirve a la vista y al resumen
+SQL_TRAMO = """
+    CASE
+        WHEN d.fecha_estimada_pago IS NULL OR d.fecha_estimada_pago >= {hoy} THEN 'corriente'
+        WHEN {hoy} - d.fecha_estimada_pago <= 30 THEN '1_30'
+        WHEN {hoy} - d.fecha_estimada_pago <= 60 THEN '31_60'
+        WHEN {hoy} - d.fecha_estimada_pago <= 90 THEN '61_90'
+        ELSE 'mas_90'
+    END
+"""
+
+
+class ReporteAntiguedad(models.Model):
+    _name = 'ventas.reporte.antiguedad'
+    _description = 'Antigüedad de Deudas'
+    _auto = False
+    _rec_name = 'deuda_id'
+    _order = 'dias_atraso desc'
+
+    deuda_id = fields.Many2one('ventas.deuda', string='Deuda', readonly=True)
+    persona_id = fields.Many2one('ventas.persona', string='Persona', readonly=True)
+    viaje_id = fields.Many2one('ventas.viaje', string='Viaje', readonly=True)
+    producto_id = fields.Many2one('ventas.producto', string='Producto', readonly=True)
+    fecha_estimada_pago = fields.Date(string='Fecha Estimada de Pago', readonly=True)
+    dias_atraso = fields.Integer(string='Días de Atraso', readonly=True)
+    tramo = fields.Selection(TRAMOS, string='Tramo', readonly=True)
+    monto_pendiente = fields.Float(string='Pendiente', readonly=True)
+    corriente = fields.Float(string='Al Día', readonly=True)
+    tramo_1_30 = fields.Float(string='1-30 días', readonly=True)
+    tramo_31_60 = fields.Float(string='31-60 días', readonly=True)
+    tramo_61_90 = fields.Float(string='61-90 días', readonly=True)
+    tramo_mas_90 = fields.Float(string='Más de 90 días', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        tramo = SQL_TRAMO.format(hoy='CURRENT_DATE')
+        self.env.cr.execute(f"""
+            CREATE VIEW {self._table} AS (
+                SELECT id, id AS deuda_id, persona_id, viaje_id, producto_id,
+                       fecha_estimada_pago, dias_atraso, tramo, monto_pendiente,
+                       CASE WHEN tramo = 'corriente' THEN monto_pendiente ELSE 0.0 END AS corriente,
+                       CASE WHEN tramo = '1_30' THEN monto_pendiente ELSE 0.0 END AS tramo_1_30,
+                       CASE WHEN tramo = '31_60' THEN monto_pendiente ELSE 0.0 END AS tramo_31_60,
+                       CASE WHEN tramo = '61_90' THEN monto_pendiente ELSE 0.0 END AS tramo_61_90,
+                       CASE WHEN tramo = 'mas_90' THEN monto_pendiente ELSE 0.0 END AS tramo_mas_90
+                  FROM (
+                        SELECT d.id, d.persona_id, d.viaje_id, d.producto_id,
+                               d.fecha_estimada_pago, d.monto_pendiente,
+                               GREATEST(CURRENT_DATE - d.fecha_estimada_pago, 0) AS dias_atraso,
+                               {tramo} AS tramo
+                          FROM ventas_deuda d
+                         WHERE d.estado != 'pagado'
+                       ) abiertas
+            )
+        """)
+
+    @api.model
+    def resumen(self, agrupar='persona_id', ids=None):
+        """``{id: {tramo: monto}}`` de lo pendiente por persona o por viaje.
+
+        Con ``ids`` solo se calculan esos grupos. El resultado se guarda en
+        caché por día y por versión de las deudas; no se debe modificar.
+        """
+        if agrupar not in ('persona_id', 'viaje_id'):
+            raise ValueError(agrupar)
+        hoy = fields.Date.context_today(self)
+        ids = tuple(sorted(ids)) if ids is not None else None
+        version = self.env['ventas.agregacion']._version('deudas')
+        if version is None:
+            return self._calcular_resumen(hoy, agrupar, ids)
+        return self._resumen(hoy, version, agrupar, ids)
+
+    @tools.ormcache('hoy', 'version', 'agrupar', 'ids')
+    def _resumen(self, hoy, version, agrupar, ids):
+        return self._calcular_resumen(hoy, agrupar, ids)
+
+    def _calcular_resumen(self, hoy, agrupar, ids):
+        if ids is not None and not ids:
+            return {}
+        self.env['ventas.deuda'].flush_model()
+        self.env.cr.execute(f"""
+            SELECT d.{agrupar}, {SQL_TRAMO.format(hoy='%(hoy)s::date')} AS tramo,
+                   SUM(d.monto_pendiente)
+              FROM ventas_deuda d
+             WHERE d.estado != 'pagado'
+               AND (%(todos)s OR d.{agrupar} = ANY(%(ids)s::int[]))
+             GROUP BY 1, 2
+        """, {'hoy': hoy, 'todos': ids is None, 'ids': list(ids or ())})
+        resultado = {}
+        for clave, tramo, monto in self.env.cr.fetchall():
+            resultado.setdefault(clave, dict.fromkeys(dict(TRAMOS), 0.0))[tramo] = monto or 0.0
+        return resultado
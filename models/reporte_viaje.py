@@ -0,0 +1,106 @@
+from odoo import models, fields, api, tools
+
+
+class ReporteViaje(models.Model):
+    _name = 'ventas.reporte.viaje'
+    _description = 'Análisis Financiero de Viajes'
+    _auto = False
+    _rec_name = 'viaje_id'
+    _order = 'fecha desc'
+
+    viaje_id = fields.Many2one('ventas.viaje', string='Viaje', readonly=True)
+    producto_id = fields.Many2one('ventas.producto', string='Producto', readonly=True)
+    fecha = fields.Date(string='Fecha', readonly=True)
+    total_invertido = fields.Float(string='Total Invertido', readonly=True)
+    total_efectivo = fields.Float(string='Efectivo', readonly=True)
+    total_transferencia = fields.Float(string='Transferencia', readonly=True)
+    total_deuda = fields.Float(string='Deuda', readonly=True)
+    ganancia_real = fields.Float(string='Ganancia Real', readonly=True)
+    ganancia_potencial = fields.Float(string='Ganancia Potencial', readonly=True)
+
+    @api.model
+    def _es_materializada(self):
+        """Con el parámetro ``ventas.reporte_materializado`` la vista se materializa"""
+        parametro = self.env['ir.config_parameter'].sudo().get_param('ventas.reporte_materializado')
+        return parametro in ('1', 'True', 'true')
+
+    def _consulta(self):
+        # Cada movimiento suma en la fecha en que ocurre: la inversión en la
+        # fecha del viaje, las deudas al crearse y los pagos al cobrarse (que
+        # pasan de deuda a efectivo o transferencia)
+        return """
+            SELECT row_number() OVER (ORDER BY viaje_id, producto_id, fecha) AS id,
+                   viaje_id,
+                   producto_id,
+                   fecha,
+                   SUM(total_invertido) AS total_invertido,
+                   SUM(total_efectivo) AS total_efectivo,
+                   SUM(total_transferencia) AS total_transferencia,
+                   SUM(total_deuda) AS total_deuda,
+                   SUM(ganancia_real) AS ganancia_real,
+                   SUM(ganancia_potencial) AS ganancia_potencial
+              FROM (
+                    SELECT vp.viaje_id,
+                           vp.producto_id,
+                           v.fecha AS fecha,
+                           vp.cantidad * vp.precio_compra AS total_invertido,
+                           0.0 AS total_efectivo,
+                           0.0 AS total_transferencia,
+                           0.0 AS total_deuda,
+                           0.0 AS ganancia_real,
+                           vp.cantidad * (vp.precio_venta - vp.precio_compra) AS ganancia_potencial
+                      FROM ventas_viaje_producto vp
+                      JOIN ventas_viaje v ON v.id = vp.viaje_id
+                 UNION ALL
+                    SELECT ve.viaje_id,
+                           ve.producto_id,
+                           ve.fecha_venta::date,
+                           0.0,
+                           CASE WHEN ve.tipo_pago = 'efectivo' THEN ve.total ELSE 0.0 END,
+                           CASE WHEN ve.tipo_pago = 'transferencia' THEN ve.total ELSE 0.0 END,
+                           0.0,
+                           ve.ganancia,
+                           0.0
+                      FROM ventas_venta ve
+                     WHERE ve.tipo_pago IN ('efectivo', 'transferencia')
+                 UNION ALL
+                    SELECT d.viaje_id,
+                           d.producto_id,
+                           d.fecha_creacion::date,
+                           0.0, 0.0, 0.0,
+                           d.monto_total,
+                           0.0, 0.0
+                      FROM ventas_deuda d
+                 UNION ALL
+                    SELECT d.viaje_id,
+                           d.producto_id,
+                           p.fecha_pago::date,
+                           0.0,
+                           CASE WHEN p.tipo_pago = 'efectivo' THEN p.monto ELSE 0.0 END,
+                           CASE WHEN p.tipo_pago = 'transferencia' THEN p.monto ELSE 0.0 END,
+                           -p.monto,
+                           0.0, 0.0
+                      FROM ventas_pago_deuda p
+                      JOIN ventas_deuda d ON d.id = p.deuda_id
+                   ) movimientos
+             GROUP BY viaje_id, producto_id, fecha
+        """
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        tipo = 'MATERIALIZED VIEW' if self._es_materializada() else 'VIEW'
+        self.env.cr.execute(f'CREATE {tipo} {self._table} AS ({self._consulta()})')
+        if self._es_materializada():
+            self.env.cr.execute(f"""
+                CREATE INDEX {self._table}_viaje_fecha_idx
+                    ON {self._table} (viaje_id, fecha)
+            """)
+
+    @api.model
+    def action_refrescar(self):
+        """Recalcula la vista materializada; con la vista normal no hace nada"""
+        if self._es_materializada():
+            self.env.flush_all()
+            self.env.cr.execute(f'REFRESH MATERIALIZED VIEW {self._table}')
+            self.env.invalidate_all()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
@@ -0,0 +1,124 @@
+from odoo import models, api
+from odoo.exceptions import UserError
+
+# Campos que el dispositivo puede enviar en cada fila
+CAMPOS_VENTA = ('viaje_producto_id', 'cantidad', 'tipo_pago', 'persona_id',
+                'fecha_venta', 'fecha_estimada_pago')
+CAMPOS_PAGO = ('deuda_id', 'monto', 'tipo_pago', 'fecha_pago')
+
+
+class Sincronizacion(models.AbstractModel):
+    _name = 'ventas.sincronizacion'
+    _description = 'Sincronización de Ventas y Pagos sin Conexión'
+
+    @api.model
+    def _existentes(self, modelo, claves):
+        """``{clave: id}`` de las claves que ya se registraron, archivadas incluidas"""
+        if not claves:
+            return {}
+        # Las ventas de un viaje cerrado están archivadas, pero su clave sigue ocupada
+        return {
+            registro['clave_sincronizacion']: registro['id']
+            for registro in self.env[modelo].with_context(active_test=False).search_read(
+                [('clave_sincronizacion', 'in', list(claves))], ['clave_sincronizacion'],
+            )
+        }
+
+    @api.model
+    def _nuevas(self, filas, existentes, campo_fecha):
+        """Filas aún no registradas, sin repetir claves dentro del lote.
+
+        La fecha es obligatoria: con la tabla particionada forma parte de la
+        clave única, y una fecha por defecto distinta en cada reenvío dejaría
+        pasar duplicados.
+        """
+        nuevas = {}
+        for fila in filas:
+            clave = fila.get('clave')
+            if not clave:
+                raise UserError('Cada fila debe traer su clave de sincronización')
+            if not fila.get(campo_fecha):
+                raise UserError(f'La fila {clave} debe traer {campo_fecha}')
+            if clave not in existentes:
+                nuevas.setdefault(clave, fila)
+        return nuevas
+
+    @api.model
+    def _validar(self, ventas, pagos):
+        """Rechaza el lote con la lista de filas mal formadas antes de registrar nada"""
+
+        def _existen(modelo, ids):
+            ids = {valor for valor in ids if isinstance(valor, int)}
+            return set(self.env[modelo].browse(ids).exists().ids)
+
+        productos = _existen('ventas.viaje.producto', [fila.get('viaje_producto_id') for fila in ventas])
+        deudas = _existen('ventas.deuda', [fila.get('deuda_id') for fila in pagos])
+        errores = []
+        for fila in ventas:
+            if fila.get('viaje_producto_id') not in productos:
+                errores.append(
+                    f"Venta {fila.get('clave')}: producto del viaje desconocido "
+                    f"({fila.get('viaje_producto_id')})"
+                )
+        for fila in pagos:
+            if not fila.get('clave_venta') and fila.get('deuda_id') not in deudas:
+                errores.append(f"Pago {fila.get('clave')}: deuda desconocida ({fila.get('deuda_id')})")
+            if not isinstance(fila.get('monto'), (int, float)) or fila['monto'] <= 0:
+                errores.append(f"Pago {fila.get('clave')}: monto inválido ({fila.get('monto')})")
+        if errores:
+            raise UserError('\n'.join(errores))
+
+    @api.model
+    def aplicar_lote(self, ventas=(), pagos=()):
+        """Registra un lote de ventas y pagos capturados sin conexión.
+
+        Cada fila trae una ``clave`` única generada por el dispositivo; las
+        claves ya registradas se ignoran, así que reenviar el lote no cambia
+        nada. Un pago puede referirse a la deuda de una venta del mismo lote
+        con ``clave_venta``. Devuelve los ids de todas las claves y el
+        ``por_vender`` de los productos del viaje afectados.
+        """
+        self._validar(ventas, pagos)
+        Venta = self.env['ventas.venta']
+        ventas_existentes = self._existentes('ventas.venta', {fila.get('clave') for fila in ventas} - {None})
+        pagos_existentes = self._existentes('ventas.pago.deuda', {fila.get('clave') for fila in pagos} - {None})
+        ventas_nuevas = self._nuevas(ventas, ventas_existentes, 'fecha_venta')
+        pagos_nuevos = self._nuevas(pagos, pagos_existentes, 'fecha_pago')
+
+        viajes_producto = self.env['ventas.viaje.producto'].browse(
+            {fila['viaje_producto_id'] for fila in ventas}
+        )
+        viaje_de = {viaje_producto.id: viaje_producto.viaje_id.id for viaje_producto in viajes_producto}
+        if ventas_nuevas:
+            filas = []
+            for clave, fila in ventas_nuevas.items():
+                vals = {campo: fila[campo] for campo in CAMPOS_VENTA if fila.get(campo)}
+                vals['viaje_id'] = viaje_de[fila['viaje_producto_id']]
+                vals['clave_sincronizacion'] = clave
+                filas.append(vals)
+            creadas = Venta.create_batch(filas)
+            ventas_existentes.update(zip(ventas_nuevas, creadas.ids))
+
+        if pagos_nuevos:
+            filas = []
+            for clave, fila in pagos_nuevos.items():
+                vals = {campo: fila[campo] for campo in CAMPOS_PAGO if fila.get(campo)}
+                if fila.get('clave_venta'):
+                    venta = Venta.browse(ventas_existentes.get(fila['clave_venta']))
+                    if not venta.deuda_id:
+                        raise UserError(f"El pago {clave} no corresponde a una venta a crédito")
+                    vals['deuda_id'] = venta.deuda_id.id
+                vals['clave_sincronizacion'] = clave
+                filas.append(vals)
+            creados = self.env['ventas.pago.deuda'].create(filas)
+            pagos_existentes.update(zip(pagos_nuevos, creados.ids))
+
+        self.env.flush_all()
+        return {
+            'ventas': ventas_existentes,
+            'pagos': pagos_existentes,
+            'por_vender': {
+                registro['id']: registro['por_vender']
+                for registro in viajes_producto.read(['por_vender'])
+            },
+        }
@@ -1,5 +1,11 @@
 from odoo import models, fields, api
-from datetime import date
+from odoo.exceptions import UserError, ValidationError
+from collections import defaultdict
+
+# Campos de la venta que cambian su aporte a los totales del viaje
+CAMPOS_TOTALES_VIAJE = {'viaje_id', 'viaje_producto_id', 'cantidad', 'precio_unitario', 'tipo_pago'}
+# Campos de una venta a crédito que se copian a su deuda
+CAMPOS_DEUDA = ('persona_id', 'viaje_producto_id', 'cantidad', 'precio_unitario', 'fecha_estimada_pago')
 
 class Venta(models.Model):
     _name = 'ventas.venta'
@@ -17,22 +23,22 @@ class Venta(models.Model):
         'ventas.viaje.producto',
         string='Producto del Viaje',
         required=True,
-        domain="[('viaje_id', '=', viaje_id)]"
+        domain="[('viaje_id', '=', viaje_id)]",
+        index=True
     )
     producto_id = fields.Many2one(
         'ventas.producto',
         string='Producto',
         related='viaje_producto_id.producto_id',
         store=True,
-        readonly=True
+        readonly=True,
+        index=True
     )
     cantidad = fields.Integer(string='Cantidad', required=True, default=1)
     
-    precio_unitario = fields.Float(
-        string='Precio Unitario',
-        related='viaje_producto_id.precio_venta',
-        store=True
-    )
+    # Precio congelado al momento de la venta: editar el precio del producto
+    # en el viaje no reescribe las ventas históricas
+    precio_unitario = fields.Float(string='Precio Unitario')
     total = fields.Float(
         string='Total',
         compute='_compute_total',
@@ -45,26 +51,36 @@ class Venta(models.Model):
     )
     tipo_pago = fields.Selection([
         ('efectivo', 'Efectivo'),
-        ('transferencia', 'Transferencia')
+        ('transferencia', 'Transferencia'),
+        ('deuda', 'Deuda')
     ], string='Tipo de Pago', required=True, default='efectivo')
     
     # Campos para deudas
     persona_id = fields.Many2one(
         'ventas.persona',
         string='Persona',
+        index=True
     )
     fecha_estimada_pago = fields.Date(string='Fecha Estimada de Pago')
     deuda_id = fields.Many2one(
         'ventas.deuda',
         string='Deuda Asociada',
-        readonly=True
+        readonly=True,
+        index=True
     )
     
     fecha_venta = fields.Datetime(
         string='Fecha de Venta',
-        default=fields.Datetime.now
+        default=fields.Datetime.now,
+        index=True
     )
     
+    # Archivada al cerrar su viaje
+    active = fields.Boolean(string='Activo', default=True, index=True)
+
+    # Clave generada por el dispositivo que registró la venta sin conexión
+    clave_sincronizacion = fields.Char(string='Clave de Sincronización', readonly=True, copy=False)
+
     estado = fields.Selection([
         ('pagado', 'Pagado'),
         ('deuda', 'Deuda'),
@@ -77,54 +93,6 @@ class Venta(models.Model):
         store=True
     )
 
-    tipo_pago_html = fields.Html(
-        string='Tipo de Pago',
-        compute='_compute_tipo_pago_html',
-        store=False,
-        sanitize=False
-    )
-    
-    @api.depends('tipo_pago')
-    def _compute_tipo_pago_html(self):
-        for venta in self:
-            if venta.tipo_pago == 'efectivo':
-                html = '''
-                    <div style="
-                        background: linear-gradient(135deg, #28a745 0%, #20c997 100%);
-                        color: white;
-                        padding: 4px 12px;
-                        border-radius: 15px;
-                        display: inline-flex;
-                        align-items: center;
-                        gap: 6px;
-                        font-weight: 600;
-                        font-size: 12px;
-                        box-shadow: 0 2px 4px rgba(40, 167, 69, 0.2);
-                    ">
-                        <i class="fa fa-money-bill-wave" style="font-size: 11px;"></i>
-                        <span>Efectivo</span>
-                    </div>
-                '''
-            else:  # transferencia
-                html = '''
-                    <div style="
-                        background: linear-gradient(135deg, #007bff 0%, #0056b3 100%);
-                        color: white;
-                        padding: 4px 12px;
-                        border-radius: 15px;
-                        display: inline-flex;
-                        align-items: center;
-                        gap: 6px;
-                        font-weight: 600;
-                        font-size: 12px;
-                        box-shadow: 0 2px 4px rgba(0, 123, 255, 0.2);
-                    ">
-                        <i class="fa fa-university" style="font-size: 11px;"></i>
-                        <span>Transferencia</span>
-                    </div>
-                '''
-            venta.tipo_pago_html = html
-
     @api.depends('producto_id.nombre', 'viaje_id.nombre', 'viaje_id.fecha')
     def _compute_display_name(self):
         """Calcula el nombre mostrado: 'Viaje-Producto-Cantidad (Fecha)'"""
@@ -160,20 +128,209 @@ class Venta(models.Model):
     @api.depends('tipo_pago')
     def _compute_estado(self):
         for venta in self:
-            if venta.tipo_pago == 'deuda':
-                venta.estado = 'deuda'
-                # Crear registro de deuda automáticamente
-                if not venta.deuda_id and venta.persona_id:
-                    deuda = self.env['ventas.deuda'].create({
-                        'persona_id': venta.persona_id.id,
-                        'venta_id': venta.id,
-                        'monto_total': venta.total,
-                        'monto_pendiente': venta.total,
-                        'fecha_estimada_pago': venta.fecha_estimada_pago,
-                    })
-                    venta.deuda_id = deuda.id
-            else:
-                venta.estado = 'pagado'
+            venta.estado = 'deuda' if venta.tipo_pago == 'deuda' else 'pagado'
+
+    def _auto_init(self):
+        if self.env['ventas.particion']._es_particionada(self._table):
+            return self.env['ventas.particion']._agregar_columnas(self)
+        return super()._auto_init()
+
+    def init(self):
+        # Índices de una columna que ya cubre la primera columna de los compuestos
+        self.env.cr.execute("DROP INDEX IF EXISTS ventas_venta__viaje_id_index")
+        # Ventas de un viaje por tipo de pago (lista de ventas y totales del viaje)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS ventas_venta_viaje_tipo_pago_idx
+                ON ventas_venta (viaje_id, tipo_pago)
+        """)
+        # La versión del resumen financiero ya no se lee de write_date
+        self.env.cr.execute("DROP INDEX IF EXISTS ventas_venta_viaje_write_date_idx")
+        # Reenviar un lote sincronizado no duplica ventas. Con la tabla
+        # particionada la unicidad incluye la fecha, que el lote reenvía igual
+        columnas = 'clave_sincronizacion'
+        if self.env['ventas.particion']._es_particionada(self._table):
+            columnas += ', fecha_venta'
+        self.env.cr.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS ventas_venta_clave_sincronizacion_uniq
+                ON ventas_venta ({columnas})
+             WHERE clave_sincronizacion IS NOT NULL
+        """)
+
+    def _deltas_viaje(self, signo=1):
+        """Aporte firmado de estas ventas a los totales de sus viajes"""
+        deltas = defaultdict(lambda: defaultdict(float))
+        for venta in self:
+            if venta.tipo_pago in ('efectivo', 'transferencia'):
+                delta = deltas[venta.viaje_id.id]
+                delta['total_' + venta.tipo_pago] += signo * venta.total
+                delta['ganancia_total_real'] += signo * venta.ganancia
+        return deltas
+
+    def _deltas_producto(self, signo=1):
+        """Aporte firmado de estas ventas a los contadores de sus productos"""
+        deltas = defaultdict(lambda: defaultdict(float))
+        for venta in self:
+            delta = deltas[venta.producto_id.id]
+            delta['total_ventas'] += signo
+            delta['cantidad_vendida'] += signo * venta.cantidad
+            delta['ingresos_total'] += signo * venta.total
+        return deltas
+
+    def _cantidades_stock(self, signo=1):
+        """Unidades firmadas que estas ventas toman de cada producto del viaje"""
+        cantidades = defaultdict(int)
+        for venta in self:
+            # Las ventas a crédito se cuentan por su deuda
+            if venta.tipo_pago != 'deuda':
+                cantidades[venta.viaje_producto_id.id] += signo * venta.cantidad
+        return cantidades
+
+    @api.onchange('viaje_producto_id')
+    def _onchange_viaje_producto_id(self):
+        self.precio_unitario = self.viaje_producto_id.precio_venta
+
+    @api.model
+    def _completar_precio(self, vals):
+        """Toma el precio vigente del producto si no viene en ``vals``"""
+        if vals.get('viaje_producto_id') and 'precio_unitario' not in vals:
+            viaje_producto = self.env['ventas.viaje.producto'].browse(vals['viaje_producto_id'])
+            vals['precio_unitario'] = viaje_producto.precio_venta
+        return vals
+
+    @api.model
+    def _valores_deuda(self, vals):
+        if not vals.get('persona_id'):
+            raise ValidationError('Las ventas a crédito requieren una persona')
+        return {
+            'persona_id': vals['persona_id'],
+            'viaje_producto_id': vals['viaje_producto_id'],
+            'cantidad': vals.get('cantidad', 1),
+            'precio_unitario': vals['precio_unitario'],
+            'fecha_estimada_pago': vals.get('fecha_estimada_pago') or False,
+        }
+
+    @api.model
+    def _crear_deudas(self, vals_list):
+        """Crea con un único create las deudas de las ventas a crédito de ``vals_list``"""
+        credito = [
+            vals for vals in vals_list
+            if vals.get('tipo_pago') == 'deuda' and not vals.get('deuda_id')
+        ]
+        if not credito:
+            return
+        deudas = self.env['ventas.deuda'].create([self._valores_deuda(vals) for vals in credito])
+        for vals, deuda in zip(credito, deudas):
+            vals['deuda_id'] = deuda.id
+
+    def _importes_caja(self):
+        """``{venta_id: movimiento}`` del dinero que entra por las ventas pagadas, a su fecha"""
+        return {
+            venta.id: {
+                'fecha': venta.fecha_venta,
+                'tipo_pago': venta.tipo_pago,
+                'monto': venta.total,
+                'viaje_id': venta.viaje_id.id,
+                'concepto': f'Venta {venta.display_name}',
+            }
+            for venta in self if venta.tipo_pago in ('efectivo', 'transferencia')
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_list = [self._completar_precio(dict(vals)) for vals in vals_list]
+        self._crear_deudas(vals_list)
+        ventas = super(Venta, self.with_context(ventas_omitir_deltas=True)).create(vals_list)
+        self.env['ventas.viaje.producto']._reservar(ventas._cantidades_stock())
+        self.env['ventas.viaje']._aplicar_deltas(ventas._deltas_viaje())
+        self.env['ventas.producto']._aplicar_deltas(ventas._deltas_producto())
+        self.env['ventas.movimiento.caja']._registrar_altas('venta_id', ventas._importes_caja())
+        return ventas.with_env(self.env)
+
+    @api.model
+    def create_batch(self, rows):
+        """Registra un lote de ventas con un único ``create``.
+
+        El stock de todo el lote se reserva de una vez en ``create`` y los
+        recálculos dependientes se fuerzan una sola vez al final.
+        """
+        if not rows:
+            return self.browse()
+        ventas = self.create(rows)
+        self.env.flush_all()
+        return ventas
+
+    def _deudas_sin_pagos(self):
+        """Deudas de estas ventas a crédito, que aún no pueden tener pagos"""
+        deudas = self.deuda_id
+        pagadas = deudas.filtered('pagos_ids')
+        if pagadas:
+            raise UserError(
+                'La deuda %s ya tiene pagos; elimine los pagos antes de cambiar o borrar la venta'
+                % ', '.join(pagadas.mapped('display_name'))
+            )
+        return deudas
+
+    def write(self, vals):
+        vals = self._completar_precio(dict(vals))
+        if vals.get('tipo_pago', 'deuda') != 'deuda':
+            # Pasar a contado: la deuda deja de existir antes de que la venta
+            # tome su stock, para no contar dos veces ni el dinero ni las unidades
+            self._deudas_sin_pagos().unlink()
+            vals['deuda_id'] = False
+        if not CAMPOS_TOTALES_VIAJE.intersection(vals):
+            res = super().write(vals)
+        else:
+            antes = self._deltas_viaje(-1)
+            productos_antes = self._deltas_producto(-1)
+            stock_antes = self._cantidades_stock(-1)
+            caja_antes = self._importes_caja()
+            res = super(Venta, self.with_context(ventas_omitir_deltas=True)).write(vals)
+            self.env['ventas.viaje.producto']._reservar(stock_antes, self._cantidades_stock())
+            self.env['ventas.viaje']._aplicar_deltas(antes, self._deltas_viaje())
+            self.env['ventas.producto']._aplicar_deltas(productos_antes, self._deltas_producto())
+            self.env['ventas.movimiento.caja']._registrar_cambios(
+                'venta_id', caja_antes, self._importes_caja()
+            )
+        valores_deuda = {campo: vals[campo] for campo in CAMPOS_DEUDA if campo in vals}
+        if valores_deuda:
+            self.filtered(lambda v: v.tipo_pago == 'deuda').deuda_id.write(valores_deuda)
+        if vals.get('tipo_pago') == 'deuda':
+            self._generar_deudas_faltantes()
+        return res
+
+    def _generar_deudas_faltantes(self):
+        """Crea de una vez las deudas de las ventas pasadas a crédito"""
+        sin_deuda = self.filtered(lambda v: v.tipo_pago == 'deuda' and not v.deuda_id)
+        if not sin_deuda:
+            return
+        deudas = self.env['ventas.deuda'].create([
+            self._valores_deuda({
+                'persona_id': venta.persona_id.id,
+                'viaje_producto_id': venta.viaje_producto_id.id,
+                'cantidad': venta.cantidad,
+                'precio_unitario': venta.precio_unitario,
+                'fecha_estimada_pago': venta.fecha_estimada_pago,
+            })
+            for venta in sin_deuda
+        ])
+        for venta, deuda in zip(sin_deuda, deudas):
+            venta.deuda_id = deuda
+
+    def unlink(self):
+        deudas = self._deudas_sin_pagos()
+        deltas = self._deltas_viaje(-1)
+        productos = self._deltas_producto(-1)
+        stock = self._cantidades_stock(-1)
+        caja = self._importes_caja()
+        self.env['ventas.movimiento.caja']._desvincular('venta_id', self.ids)
+        res = super().unlink()
+        # La deuda de una venta a crédito se va con ella y devuelve su stock
+        deudas.unlink()
+        self.env['ventas.viaje.producto']._reservar(stock)
+        self.env['ventas.viaje']._aplicar_deltas(deltas)
+        self.env['ventas.producto']._aplicar_deltas(productos)
+        self.env['ventas.movimiento.caja']._registrar_cambios('venta_id', caja, {})
+        return res
 
     @api.onchange('tipo_pago')
     def _onchange_tipo_pago(self):
@@ -1,8 +1,25 @@
-from odoo import models, fields, api
-from datetime import date
+from odoo import models, fields, api, tools
+from odoo.exceptions import UserError
+from collections import defaultdict
 import logging
 _logger = logging.getLogger(__name__)
 
+# Totales que ventas, deudas y pagos actualizan con su delta firmado
+CAMPOS_DELTA = (
+    'total_efectivo',
+    'total_transferencia',
+    'total_deuda',
+    'ganancia_total_real',
+)
+# Totales derivados de los anteriores, ajustados en el mismo UPDATE
+CAMPOS_DERIVADOS = ('total_dinero_en_mano', 'total_vendido')
+# Totales calculados que un viaje cerrado toma de su resumen de cierre
+CAMPOS_CONGELADOS = ('total_invertido', 'ganancia_total_potencial')
+# Totales del viaje que se sirven en el resumen financiero
+CAMPOS_RESUMEN = CAMPOS_DELTA + CAMPOS_DERIVADOS + CAMPOS_CONGELADOS + ('total_por_vender',)
+# Campos propios del viaje cuya escritura cambia su resumen financiero
+CAMPOS_VERSION = set(CAMPOS_RESUMEN) | {'active', 'fecha_cierre'}
+
 class Viaje(models.Model):
     _name = 'ventas.viaje'
     _description = 'Viaje'
@@ -13,6 +30,11 @@ class Viaje(models.Model):
     nombre = fields.Char(string='Nombre del Viaje', required=True, index=True)
     fecha = fields.Date(string='Fecha', default=fields.Date.today, index=True)
 
+    # Un viaje cerrado se archiva con sus ventas y deudas y congela sus totales
+    active = fields.Boolean(string='Activo', default=True, index=True)
+    fecha_cierre = fields.Datetime(string='Fecha de Cierre', readonly=True, copy=False)
+    resumen_cierre = fields.Json(string='Resumen al Cierre', readonly=True, copy=False)
+
     total_invertido = fields.Float(
         string='Total Invertido', 
         compute='_compute_totales',
@@ -25,29 +47,29 @@ class Viaje(models.Model):
     )
     ganancia_total_real = fields.Float(
         string='Ganancia Total Real',
-        compute='_compute_totales',
-        store=True
+        readonly=True,
+        default=0.0
     )
     total_efectivo = fields.Float(
         string='Total Efectivo',
-        compute='_compute_totales',
-        store=True
+        readonly=True,
+        default=0.0
     )
     total_transferencia = fields.Float(
         string='Total Transferencia',
-        compute='_compute_totales',
-        store=True
+        readonly=True,
+        default=0.0
     )
     total_deuda = fields.Float(
         string='Total Deuda',
-        compute='_compute_totales',
-        store=True
+        readonly=True,
+        default=0.0
     )
     
     total_vendido = fields.Float(
         string='Total vendido',
-        compute='_compute_totales',
-        store=True
+        readonly=True,
+        default=0.0
     )
 
     total_por_vender = fields.Float(
@@ -57,8 +79,8 @@ class Viaje(models.Model):
     )
     total_dinero_en_mano = fields.Float(
         string='Total dinero en mano',
-        compute='_compute_totales',
-        store=True
+        readonly=True,
+        default=0.0
     )
     
     
@@ -80,67 +102,321 @@ class Viaje(models.Model):
         string='Deudas del Viaje'
     )
 
+    # Contadores de los botones del formulario, tomados del resumen en caché
+    cantidad_ventas = fields.Integer(string='Ventas', compute='_compute_cantidades')
+    cantidad_deudas = fields.Integer(string='Deudas', compute='_compute_cantidades')
+    resumen_kpi = fields.Json(string='Resumen Financiero', compute='_compute_cantidades')
+    # Cambia con cada venta, deuda o pago del viaje; clave de la caché del resumen
+    version_resumen = fields.Integer(readonly=True, copy=False)
+    # Modo diferido activo (parámetro ``ventas.recalculo_diferido``): muestra "Actualizar Ahora"
+    recalculo_diferido = fields.Boolean(compute='_compute_recalculo_diferido')
+
      # Agregar índices
     _order = 'fecha desc, nombre'
 
     
    
 
-    @api.depends('viaje_producto_ids', 'ventas_ids', 'deudas_ids', 'deudas_ids.pagos_ids', 
-                 'deudas_ids.estado', 'deudas_ids.monto_pendiente')
+    @api.depends('viaje_producto_ids.total_invertido',
+                 'viaje_producto_ids.total_ganancia_potencial',
+                 'fecha_cierre')
     def _compute_totales(self):
+        reales = self.filtered(lambda viaje: viaje.id and not viaje.fecha_cierre)
+        productos = self.env['ventas.agregacion']._sumar(
+            'ventas.viaje.producto', [('viaje_id', 'in', reales.ids)],
+            ['viaje_id'], ['total_invertido:sum', 'total_ganancia_potencial:sum'],
+        )
         for viaje in self:
+            if viaje.fecha_cierre:
+                # Viaje cerrado: no se consulta nada, se lee lo congelado
+                for campo in CAMPOS_CONGELADOS:
+                    viaje[campo] = (viaje.resumen_cierre or {}).get(campo, 0.0)
+                continue
+            if not viaje.id:
+                # Registro nuevo (onchange): aún no está en la base de datos
+                viaje.total_invertido = sum(viaje.viaje_producto_ids.mapped('total_invertido'))
+                viaje.ganancia_total_potencial = sum(
+                    viaje.viaje_producto_ids.mapped('total_ganancia_potencial')
+                )
+                continue
             # Totales de inversión
-            viaje.total_invertido = sum(
-                viaje.viaje_producto_ids.mapped('total_invertido')
-            )
-            
+            viaje.total_invertido = productos[viaje.id]['total_invertido:sum']
             # Ganancia potencial
-            viaje.ganancia_total_potencial = sum(
-                viaje.viaje_producto_ids.mapped('total_ganancia_potencial')
-            )
+            viaje.ganancia_total_potencial = productos[viaje.id]['total_ganancia_potencial:sum']
+
+    def init(self):
+        self.env.cr.execute('CREATE SEQUENCE IF NOT EXISTS ventas_viaje_version_resumen_seq')
+
+    def write(self, vals):
+        res = super().write(vals)
+        if CAMPOS_VERSION.intersection(vals):
+            self._cambiar_version_resumen()
+        return res
+
+    def _cambiar_version_resumen(self):
+        """Da a estos viajes una versión nueva de su resumen financiero.
 
-           
-            
-            # Totales de ventas por tipo de pago
-            ventas = viaje.ventas_ids
+        La versión sale de una secuencia, que no devuelve dos veces el mismo
+        valor: un cambio deshecho con la transacción no deja en la caché un
+        resumen con una versión que otro cambio pueda volver a tomar.
+        """
+        ids = [viaje_id for viaje_id in self.ids if viaje_id]
+        if not ids:
+            return
+        self.env.cr.execute("""
+            UPDATE ventas_viaje
+               SET version_resumen = nextval('ventas_viaje_version_resumen_seq')
+             WHERE id = ANY(%s)
+        """, (ids,))
+        self.browse(ids).invalidate_recordset(['version_resumen'])
 
-            # Totales de deudas pagadas por tipo de pago que se suma al efectivo y la transferenci
-            deudas_pendientes = viaje.deudas_ids
-            #total de dinero real de las deudas
-            deudas_pagadas_efectivo = sum(
-                deudas_pendientes.mapped('pagos_ids').filtered(lambda p: p.tipo_pago == 'efectivo').mapped('monto')
+    @api.model
+    def _aplicar_deltas(self, *deltas):
+        """Suma a cada viaje la variación firmada de sus totales.
+
+        Cada delta es ``{viaje_id: {campo: monto}}`` con campos de
+        ``CAMPOS_DELTA``; los totales derivados se ajustan en el mismo UPDATE.
+        """
+        if self.env.context.get('ventas_omitir_deltas'):
+            return
+        self.browse({viaje_id for delta in deltas for viaje_id in delta if viaje_id})._comprobar_abiertos()
+        cola = self.env['ventas.recalculo.pendiente']
+        if cola._activo():
+            # Modo diferido: no se toca la fila del viaje, el cron lo recalcula
+            cola._encolar(self._name, [viaje_id for delta in deltas for viaje_id in delta])
+            return
+        acumulado = defaultdict(lambda: defaultdict(float))
+        for delta in deltas:
+            for viaje_id, montos in delta.items():
+                totales = acumulado[viaje_id]
+                for campo, monto in montos.items():
+                    totales[campo] += monto
+        # También los viajes sin variación de dinero: cambian sus contadores
+        acumulado = {viaje_id: montos for viaje_id, montos in acumulado.items() if viaje_id}
+        if not acumulado:
+            return
+
+        campos = list(CAMPOS_DELTA + CAMPOS_DERIVADOS)
+        self.flush_model(campos)
+        for viaje_id, montos in acumulado.items():
+            self.env.cr.execute("""
+                UPDATE ventas_viaje
+                   SET total_efectivo = COALESCE(total_efectivo, 0) + %(efectivo)s,
+                       total_transferencia = COALESCE(total_transferencia, 0) + %(transferencia)s,
+                       total_deuda = COALESCE(total_deuda, 0) + %(deuda)s,
+                       ganancia_total_real = COALESCE(ganancia_total_real, 0) + %(ganancia)s,
+                       total_dinero_en_mano = COALESCE(total_dinero_en_mano, 0)
+                                              + %(efectivo)s + %(transferencia)s,
+                       total_vendido = COALESCE(total_vendido, 0)
+                                       + %(efectivo)s + %(transferencia)s + %(deuda)s,
+                       version_resumen = nextval('ventas_viaje_version_resumen_seq'),
+                       write_uid = %(uid)s,
+                       write_date = (NOW() AT TIME ZONE 'UTC')
+                 WHERE id = %(id)s
+            """, {
+                'id': viaje_id,
+                'uid': self.env.uid,
+                'efectivo': montos.get('total_efectivo', 0.0),
+                'transferencia': montos.get('total_transferencia', 0.0),
+                'deuda': montos.get('total_deuda', 0.0),
+                'ganancia': montos.get('ganancia_total_real', 0.0),
+            })
+        self.browse(list(acumulado)).invalidate_recordset(
+            campos + ['version_resumen', 'write_uid', 'write_date']
+        )
+
+    def _recalcular_totales(self):
+        """Reconstruye desde cero los totales mantenidos por deltas (reparación).
+
+        Usa un GROUP BY por modelo hijo para todo el conjunto de viajes, así que
+        el número de consultas no depende de cuántos viajes o ventas haya.
+        """
+        # Los totales de un viaje cerrado quedaron congelados
+        viajes = self.filtered(lambda viaje: not viaje.fecha_cierre)
+        agregacion = self.env['ventas.agregacion']
+        ventas = agregacion._sumar(
+            'ventas.venta', [('viaje_id', 'in', viajes.ids)],
+            ['viaje_id', 'tipo_pago'], ['total:sum', 'ganancia:sum'],
+        )
+        # Dinero real de las deudas, por tipo de pago
+        pagos = agregacion._sumar(
+            'ventas.pago.deuda', [('viaje_id', 'in', viajes.ids)],
+            ['viaje_id', 'tipo_pago'], ['monto:sum'],
+        )
+        deudas = agregacion._sumar(
+            'ventas.deuda', [('viaje_id', 'in', viajes.ids)],
+            ['viaje_id'], ['monto_pendiente:sum'],
+        )
+        for viaje in viajes:
+            total_efectivo = (
+                ventas[viaje.id, 'efectivo']['total:sum']
+                + pagos[viaje.id, 'efectivo']['monto:sum']
             )
-            
-            deudas_pagadas_transferencia = sum(
-                deudas_pendientes.mapped('pagos_ids').filtered(lambda p: p.tipo_pago == 'transferencia').mapped('monto')
+            total_transferencia = (
+                ventas[viaje.id, 'transferencia']['total:sum']
+                + pagos[viaje.id, 'transferencia']['monto:sum']
             )
-
-            viaje.total_efectivo = sum(
-                ventas.filtered(lambda v: v.tipo_pago == 'efectivo')
-                .mapped('total')
-            )  + deudas_pagadas_efectivo
-            viaje.total_transferencia = sum(
-                ventas.filtered(lambda v: v.tipo_pago == 'transferencia')
-                .mapped('total')
-            ) + deudas_pagadas_transferencia
-            
             # Ganancia real (solo ventas pagadas)
-            ventas_pagadas = ventas.filtered(
-                lambda v: v.tipo_pago in ['efectivo', 'transferencia']
+            ganancia_total_real = (
+                ventas[viaje.id, 'efectivo']['ganancia:sum']
+                + ventas[viaje.id, 'transferencia']['ganancia:sum']
             )
-            viaje.ganancia_total_real = sum(
-                ventas_pagadas.mapped('ganancia')
+            total_deuda = deudas[viaje.id]['monto_pendiente:sum']
+            viaje.write({
+                'total_efectivo': total_efectivo,
+                'total_transferencia': total_transferencia,
+                'ganancia_total_real': ganancia_total_real,
+                'total_deuda': total_deuda,
+                'total_dinero_en_mano': total_efectivo + total_transferencia,
+                'total_vendido': total_efectivo + total_transferencia + total_deuda,
+            })
+
+    def _comprobar_abiertos(self):
+        cerrados = self.filtered('fecha_cierre')
+        if cerrados:
+            raise UserError(
+                'El viaje %s está cerrado; reábralo para modificar sus ventas, deudas o pagos'
+                % ', '.join(cerrados.mapped('nombre'))
             )
-            
-            # Total deuda
-            viaje.total_deuda  = sum(
-                deudas_pendientes.mapped('monto_pendiente')
+
+    def action_cerrar_viaje(self):
+        """Congela los totales y archiva el viaje junto con sus ventas y deudas.
+
+        Solo se cierran viajes sin deudas abiertas. Los registros archivados
+        quedan fuera de las búsquedas por defecto.
+        """
+        abiertos = self.filtered(lambda viaje: not viaje.fecha_cierre)
+        if not abiertos:
+            return True
+        Deuda = self.env['ventas.deuda'].with_context(active_test=False)
+        con_deuda = Deuda.search([
+            ('viaje_id', 'in', abiertos.ids), ('estado', '!=', 'pagado'),
+        ]).viaje_id
+        if con_deuda:
+            raise UserError(
+                'No se puede cerrar %s: tiene deudas sin pagar' % ', '.join(con_deuda.mapped('nombre'))
             )
-            
-            viaje.total_dinero_en_mano=viaje.total_efectivo + viaje.total_transferencia
-            viaje.total_vendido=viaje.total_dinero_en_mano + viaje.total_deuda
+        self.env['ventas.recalculo.pendiente']._procesar(self._name, abiertos.ids)
+        abiertos._recalcular_totales()
+        campos = CAMPOS_DELTA + CAMPOS_DERIVADOS + CAMPOS_CONGELADOS
+        resumenes = {viaje.id: {campo: viaje[campo] for campo in campos} for viaje in abiertos}
+        self.env['ventas.venta'].with_context(active_test=False).search(
+            [('viaje_id', 'in', abiertos.ids)]
+        ).write({'active': False})
+        Deuda.search([('viaje_id', 'in', abiertos.ids)]).write({'active': False})
+        ahora = fields.Datetime.now()
+        for viaje in abiertos:
+            viaje.write({
+                'active': False,
+                'fecha_cierre': ahora,
+                'resumen_cierre': resumenes[viaje.id],
+            })
+        return True
+
+    def action_reabrir_viaje(self):
+        """Devuelve el viaje, sus ventas y sus deudas al trabajo diario"""
+        cerrados = self.filtered('fecha_cierre')
+        cerrados.write({'active': True, 'fecha_cierre': False, 'resumen_cierre': False})
+        self.env['ventas.venta'].with_context(active_test=False).search(
+            [('viaje_id', 'in', cerrados.ids), ('active', '=', False)]
+        ).write({'active': True})
+        self.env['ventas.deuda'].with_context(active_test=False).search(
+            [('viaje_id', 'in', cerrados.ids), ('active', '=', False)]
+        ).write({'active': True})
+        cerrados._recalcular_totales()
+        return True
+
+    def _compute_cantidades(self):
+        resumenes = self.filtered('id').resumen_financiero()
+        for viaje in self:
+            resumen = resumenes.get(viaje.id, {})
+            viaje.resumen_kpi = resumen
+            viaje.cantidad_ventas = resumen.get('cantidad_ventas', 0)
+            viaje.cantidad_deudas = resumen.get('cantidad_deudas', 0)
+
+    def resumen_financiero(self):
+        """``{viaje_id: {kpi: valor}}`` con los totales y contadores de estos viajes.
+
+        Cada resumen se guarda en caché por viaje y ``version_resumen``, que
+        solo cambia con los movimientos de ese viaje: mientras nada cambie no se
+        vuelve a consultar. Se devuelve una copia.
+        """
+        self.check_access('read')
+        return {
+            viaje.id: dict(self._resumen_cacheado(viaje.id, viaje.version_resumen))
+            for viaje in self
+        }
+
+    @tools.ormcache('viaje_id', 'version')
+    def _resumen_cacheado(self, viaje_id, version):
+        viaje = self.sudo().with_context(active_test=False).browse(viaje_id)
+        Agregacion = self.env['ventas.agregacion'].sudo()
+        dominio = [('viaje_id', '=', viaje_id)]
+        ventas = Agregacion._sumar('ventas.venta', dominio, ['viaje_id'], ['__count'])
+        deudas = Agregacion._sumar(
+            'ventas.deuda', dominio, ['estado'], ['__count', 'monto_pendiente:sum'],
+        )
+        productos = Agregacion._sumar(
+            'ventas.viaje.producto', dominio, ['viaje_id'],
+            ['cantidad_vendido:sum', 'por_vender:sum'],
+        )
+        resumen = {campo: viaje[campo] for campo in CAMPOS_RESUMEN}
+        resumen.update({
+            'cerrado': bool(viaje.fecha_cierre),
+            'cantidad_ventas': int(ventas[viaje_id]['__count']),
+            'cantidad_deudas': int(sum(grupo['__count'] for grupo in deudas.values())),
+            'deudas_abiertas': int(sum(
+                grupo['__count'] for estado, grupo in deudas.items() if estado != 'pagado'
+            )),
+            'deudas_vencidas': int(deudas['vencida']['__count']),
+            'monto_vencido': deudas['vencida']['monto_pendiente:sum'],
+            'unidades_vendidas': int(productos[viaje_id]['cantidad_vendido:sum']),
+            'unidades_por_vender': int(productos[viaje_id]['por_vender:sum']),
+        })
+        return resumen
+
+    def _compute_recalculo_diferido(self):
+        self.recalculo_diferido = self.env['ventas.recalculo.pendiente']._activo()
+
+    def _recalcular_diferido(self):
+        self._recalcular_totales()
+
+    def action_actualizar_ahora(self):
+        """Aplica ya los recálculos diferidos pendientes de estos viajes"""
+        self.env['ventas.recalculo.pendiente']._procesar(self._name, self.ids)
+        return True
 
+    def action_recalcular_totales(self):
+        """Botón de reparación: recalcula los totales a partir de los registros"""
+        self.viaje_producto_ids._recalcular_stock()
+        self.viaje_producto_ids.producto_id._recalcular_totales_producto()
+        self._recalcular_totales()
+        return True
+
+    def _accion_lista(self, modelo, nombre):
+        """Lista paginada de ``modelo`` filtrada por este viaje.
+
+        La vista de lista pagina en el servidor y trae su propia búsqueda; se
+        incluyen las ventas y deudas archivadas de un viaje cerrado.
+        """
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'{nombre} - {self.nombre}',
+            'res_model': modelo,
+            'view_mode': 'list,form',
+            'domain': [('viaje_id', '=', self.id)],
+            'context': {
+                'default_viaje_id': self.id,
+                'active_test': False,
+            },
+        }
+
+    def action_ver_ventas(self):
+        return self._accion_lista('ventas.venta', 'Ventas')
+
+    def action_ver_deudas(self):
+        return self._accion_lista('ventas.deuda', 'Deudas')
 
     def action_crear_venta(self):
         """Abrir formulario para crear una nueva venta"""
@@ -156,6 +432,21 @@ class Viaje(models.Model):
             'default_tipo_pago': 'efectivo',
             }
         }
+
+    def action_ventas_lote(self):
+        """Abrir el asistente para registrar varias ventas de una vez"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Ventas en Lote',
+            'res_model': 'ventas.venta.lote',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {
+                'default_viaje_id': self.id,
+            }
+        }
+
 def unlink(self):
     for viaje in self:
         if viaje.ventas_ids:
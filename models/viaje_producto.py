@@ -1,4 +1,7 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
+from odoo.exceptions import ValidationError
 
 class ViajeProducto(models.Model):
     _name = 'ventas.viaje.producto'
@@ -9,24 +12,27 @@ class ViajeProducto(models.Model):
         'ventas.viaje',
         string='Viaje',
         required=True,
-        ondelete='cascade'
+        ondelete='cascade',
+        index=True
     )
     producto_id = fields.Many2one(
         'ventas.producto',
         string='Producto',
-        required=True
+        required=True,
+        index=True
     )
     cantidad = fields.Integer(string='Cantidad', required=True, default=1)
     precio_compra = fields.Float(string='Precio de Compra', required=True)
     precio_venta = fields.Float(string='Precio de Venta', required=True)
+    # Mantenida por _reservar con el registro bloqueado, no por recálculo
     cantidad_vendido = fields.Integer(
         string='Cantidad Vendida',
-        compute='_compute_ventas',
-        store=True
+        readonly=True,
+        default=0
     )
     por_vender = fields.Integer(
         string='Por Vender',
-        compute='_compute_ventas',
+        compute='_compute_por_vender',
         store=True
     )
     total_invertido = fields.Float(
@@ -41,7 +47,7 @@ class ViajeProducto(models.Model):
     )
     ganancia_actual = fields.Float(
         string='Ganancia Actual',
-        compute='_compute_ventas',
+        compute='_compute_ganancia_actual',
         store=True
     )
     
@@ -66,20 +72,113 @@ class ViajeProducto(models.Model):
                 record.precio_venta - record.precio_compra
             )
 
-    @api.depends('ventas_ids', 'cantidad', 'deudas_ids.cantidad')
-    def _compute_ventas(self):
-       
+    @api.depends('cantidad', 'cantidad_vendido')
+    def _compute_por_vender(self):
         for record in self:
-           
-            ventas = record.ventas_ids
-            deudas = record.deudas_ids
-            record.cantidad_vendido = sum(ventas.mapped('cantidad')) +sum(deudas.mapped('cantidad'))
             record.por_vender = record.cantidad - record.cantidad_vendido
-            
-            # Ganancia actual de ventas realizadas
-            ganancia = 0
-            for venta in ventas:
-                ganancia += venta.cantidad * (
-                    record.precio_venta - record.precio_compra
+
+    @api.depends('ventas_ids', 'ventas_ids.ganancia', 'ventas_ids.tipo_pago')
+    def _compute_ganancia_actual(self):
+        reales = self.filtered('id')
+        ventas = self.env['ventas.agregacion']._sumar(
+            # Ganancia de las ventas cobradas, a su precio congelado
+            'ventas.venta', [('viaje_producto_id', 'in', reales.ids), ('tipo_pago', '!=', 'deuda')],
+            ['viaje_producto_id'], ['ganancia:sum'],
+        )
+        for record in self:
+            if record.id:
+                record.ganancia_actual = ventas[record.id]['ganancia:sum']
+            else:
+                record.ganancia_actual = sum(
+                    record.ventas_ids.filtered(lambda v: v.tipo_pago != 'deuda').mapped('ganancia')
                 )
-            record.ganancia_actual = ganancia
\ No newline at end of file
+
+    @api.model
+    def _reservar(self, *cantidades):
+        """Descuenta del stock las unidades firmadas ``{viaje_producto_id: cantidad}``.
+
+        Bloquea las filas afectadas en orden de id (``FOR NO KEY UPDATE``, que
+        no choca con las ventas nuevas que solo las referencian), comprueba la
+        disponibilidad con el valor confirmado y la actualiza en el mismo
+        UPDATE, sin tocar el viaje. Dos vendedores del mismo producto se
+        esperan; los de productos distintos no. Si la fila cambió desde que
+        empezó la transacción, PostgreSQL lanza un error de serialización y
+        Odoo reintenta la petición completa.
+        """
+        acumulado = defaultdict(int)
+        for cantidad in cantidades:
+            for viaje_producto_id, unidades in cantidad.items():
+                acumulado[viaje_producto_id] += unidades
+        acumulado = {clave: valor for clave, valor in acumulado.items() if clave and valor}
+        if not acumulado:
+            return
+        self.flush_model(['cantidad', 'cantidad_vendido', 'por_vender'])
+        self.env.cr.execute("""
+            SELECT id, por_vender
+              FROM ventas_viaje_producto
+             WHERE id = ANY(%s)
+             ORDER BY id
+               FOR NO KEY UPDATE
+        """, (sorted(acumulado),))
+        disponibles = dict(self.env.cr.fetchall())
+        faltantes = [
+            (viaje_producto_id, unidades, disponibles[viaje_producto_id])
+            for viaje_producto_id, unidades in sorted(acumulado.items())
+            if unidades > 0 and unidades > (disponibles.get(viaje_producto_id) or 0)
+        ]
+        if faltantes:
+            raise ValidationError('Stock insuficiente:\n' + '\n'.join(
+                f"{self.browse(viaje_producto_id).producto_id.nombre}: se piden {unidades}, quedan {quedan}"
+                for viaje_producto_id, unidades, quedan in faltantes
+            ))
+        self.env.cr.execute("""
+            UPDATE ventas_viaje_producto vp
+               SET cantidad_vendido = COALESCE(vp.cantidad_vendido, 0) + d.unidades,
+                   por_vender = COALESCE(vp.por_vender, vp.cantidad) - d.unidades,
+                   write_uid = %s,
+                   write_date = (NOW() AT TIME ZONE 'UTC')
+              FROM unnest(%s::int[], %s::int[]) AS d(id, unidades)
+             WHERE vp.id = d.id
+        """, (self.env.uid, list(acumulado), list(acumulado.values())))
+        self.browse(list(acumulado)).invalidate_recordset(
+            ['cantidad_vendido', 'por_vender', 'write_uid', 'write_date']
+        )
+
+    def _recalcular_stock(self):
+        """Reconstruye ``cantidad_vendido`` desde las ventas y deudas (reparación)"""
+        agregacion = self.env['ventas.agregacion']
+        ventas = agregacion._sumar(
+            # Las ventas a crédito se cuentan por su deuda
+            'ventas.venta', [('viaje_producto_id', 'in', self.ids), ('tipo_pago', '!=', 'deuda')],
+            ['viaje_producto_id'], ['cantidad:sum'],
+        )
+        deudas = agregacion._sumar(
+            'ventas.deuda', [('viaje_producto_id', 'in', self.ids)],
+            ['viaje_producto_id'], ['cantidad:sum'],
+        )
+        for record in self:
+            vendido = int(ventas[record.id]['cantidad:sum'] + deudas[record.id]['cantidad:sum'])
+            if record.cantidad_vendido != vendido:
+                record.cantidad_vendido = vendido
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        productos = super().create(vals_list)
+        productos.viaje_id._cambiar_version_resumen()
+        return productos
+
+    def write(self, vals):
+        viajes = self.viaje_id
+        res = super().write(vals)
+        # Las ventas congelan el precio de venta, pero su ganancia depende
+        # del precio de compra
+        if {'precio_compra', 'viaje_id'}.intersection(vals):
+            (viajes | self.viaje_id)._recalcular_totales()
+        (viajes | self.viaje_id)._cambiar_version_resumen()
+        return res
+
+    def unlink(self):
+        viajes = self.viaje_id
+        res = super().unlink()
+        viajes.exists()._cambiar_version_resumen()
+        return res
@@ -0,0 +1,8 @@
+from . import test_cierre_diario
+from . import test_deuda
+from . import test_movimiento_caja
+from . import test_pago_persona
+from . import test_producto
+from . import test_sincronizacion
+from . import test_venta
+from . import test_viaje
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class VentasCase(TransactionCase):
+    """Un viaje con un producto en stock y una persona para fiar"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.viaje = cls.env['ventas.viaje'].create({
+            'nombre': 'Viaje de prueba',
+            'fecha': fields.Date.today(),
+        })
+        cls.producto = cls.env['ventas.producto'].create({'nombre': 'Producto de prueba'})
+        cls.viaje_producto = cls.env['ventas.viaje.producto'].create({
+            'viaje_id': cls.viaje.id,
+            'producto_id': cls.producto.id,
+            'cantidad': 10,
+            'precio_compra': 6.0,
+            'precio_venta': 10.0,
+        })
+        cls.persona = cls.env['ventas.persona'].create({'nombre': 'Persona de prueba'})
+        cls.manana = fields.Date.today() + timedelta(days=1)
+
+    def _venta(self, **valores):
+        return self.env['ventas.venta'].create(dict({
+            'viaje_id': self.viaje.id,
+            'viaje_producto_id': self.viaje_producto.id,
+            'cantidad': 1,
+            'tipo_pago': 'efectivo',
+        }, **valores))
+
+    def _venta_credito(self, **valores):
+        return self._venta(**dict({
+            'tipo_pago': 'deuda',
+            'persona_id': self.persona.id,
+            'fecha_estimada_pago': self.manana,
+        }, **valores))
+
+    def _deuda(self, **valores):
+        return self.env['ventas.deuda'].create(dict({
+            'persona_id': self.persona.id,
+            'viaje_producto_id': self.viaje_producto.id,
+            'cantidad': 1,
+            'fecha_estimada_pago': self.manana,
+        }, **valores))
@@ -0,0 +1,25 @@
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import VentasCase
+
+
+@tagged('post_install', '-at_install')
+class TestCierreDiario(VentasCase):
+
+    def test_incluye_deudas_directas_sin_duplicar(self):
+        self._venta(cantidad=1)
+        self._venta_credito(cantidad=2)
+        self.env['ventas.deuda'].create({
+            'persona_id': self.persona.id,
+            'viaje_producto_id': self.viaje_producto.id,
+            'cantidad': 3,
+            'fecha_estimada_pago': self.manana,
+        })
+        cierre = self.env['ventas.cierre.diario'].cerrar_dia(fields.Date.context_today(self.env.user))
+        self.assertEqual(cierre.ventas_efectivo, 10.0)
+        # Venta a crédito (2 x 10) más deuda directa (3 x 10), cada una una vez
+        self.assertEqual(cierre.ventas_deuda, 50.0)
+        self.assertEqual(cierre.cantidad_ventas, 3)
+        self.assertEqual(cierre.unidades_vendidas, 6)
+        self.assertEqual(sum(cierre.linea_ids.mapped('cantidad')), 6)
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import VentasCase
+
+
+@tagged('post_install', '-at_install')
+class TestDeudasVencidas(VentasCase):
+
+    def test_cron_actualiza_contadores(self):
+        deuda = self.env['ventas.deuda'].create({
+            'persona_id': self.persona.id,
+            'viaje_producto_id': self.viaje_producto.id,
+            'cantidad': 1,
+            'fecha_estimada_pago': self.manana,
+        })
+        self.assertEqual(self.producto.total_deudas_pendientes, 1)
+        self.assertIn('bg-danger', self.persona.deudas_tags_text)
+
+        # La restricción impide crearla vencida: se atrasa la fecha por SQL
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE ventas_deuda SET fecha_estimada_pago = %s WHERE id = %s",
+            (fields.Date.today() - timedelta(days=1), deuda.id),
+        )
+        self.env.invalidate_all()
+        self.env['ventas.deuda']._cron_marcar_vencidas()
+
+        self.assertEqual(deuda.estado, 'vencida')
+        self.assertEqual(self.producto.total_deudas_pendientes, 0)
+        self.assertEqual(self.persona.deudas_abiertas_count, 1)
+        self.assertIn('bg-warning', self.persona.deudas_tags_text)
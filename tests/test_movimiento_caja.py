@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import VentasCase
+
+
+@tagged('post_install', '-at_install')
+class TestMovimientoCaja(VentasCase):
+
+    def setUp(self):
+        super().setUp()
+        self.Caja = self.env['ventas.movimiento.caja']
+        self.hace_una_semana = fields.Datetime.now() - timedelta(days=7)
+        self.hace_tres_dias = fields.Datetime.now() - timedelta(days=3)
+
+    def _saldo(self, fecha):
+        return self.Caja.saldo_a_fecha(fecha, 'efectivo')['efectivo']
+
+    def test_venta_pasada_se_registra_a_su_fecha(self):
+        antes = self._saldo(self.hace_tres_dias)
+        venta = self._venta(fecha_venta=self.hace_una_semana)
+        movimiento = self.Caja.search([('venta_id', '=', venta.id)])
+        self.assertEqual(movimiento.fecha, self.hace_una_semana)
+        self.assertEqual(self._saldo(self.hace_tres_dias), antes + 10.0)
+
+    def test_venta_pasada_corre_los_saldos_posteriores(self):
+        reciente = self._venta()
+        saldo_reciente = self.Caja.search([('venta_id', '=', reciente.id)]).saldo
+        self._venta(fecha_venta=self.hace_una_semana, cantidad=2)
+        self.assertEqual(self.Caja.search([('venta_id', '=', reciente.id)]).saldo, saldo_reciente + 20.0)
+        self.assertEqual(self._saldo(fields.Datetime.now()), saldo_reciente + 20.0)
+
+    def test_cambio_se_revierte_a_la_fecha_del_cambio(self):
+        venta = self._venta(fecha_venta=self.hace_una_semana)
+        saldo_pasado = self._saldo(self.hace_tres_dias)
+        venta.write({'cantidad': 3})
+        # Los días anteriores al cambio conservan su saldo
+        self.assertEqual(self._saldo(self.hace_tres_dias), saldo_pasado)
+        self.assertEqual(self._saldo(fields.Datetime.now()), saldo_pasado + 20.0)
+        reversa = self.Caja.search([('venta_id', '=', venta.id), ('monto', '<', 0)])
+        self.assertGreater(reversa.fecha, self.hace_tres_dias)
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import VentasCase
+
+
+@tagged('post_install', '-at_install')
+class TestPagoPersona(VentasCase):
+
+    def setUp(self):
+        super().setUp()
+        ahora = fields.Datetime.now()
+        # Tres deudas de 10: la más antigua es la que vence más tarde
+        self.antigua = self._deuda(
+            fecha_creacion=ahora - timedelta(days=3), fecha_estimada_pago=self.manana + timedelta(days=9),
+        )
+        self.media = self._deuda(
+            fecha_creacion=ahora - timedelta(days=2), fecha_estimada_pago=self.manana + timedelta(days=5),
+        )
+        self.reciente = self._deuda(fecha_creacion=ahora - timedelta(days=1))
+
+    def _pagar(self, monto, orden='fecha_creacion'):
+        return self.env['ventas.pago.persona'].create({
+            'persona_id': self.persona.id,
+            'monto': monto,
+            'orden': orden,
+        }).action_pagar()
+
+    def test_salda_primero_la_mas_antigua(self):
+        self._pagar(25.0)
+        self.assertEqual(self.antigua.estado, 'pagado')
+        self.assertEqual(self.media.estado, 'pagado')
+        self.assertEqual(self.reciente.monto_pendiente, 5.0)
+        self.assertEqual(self.viaje.total_deuda, 5.0)
+        self.assertEqual(self.viaje.total_efectivo, 25.0)
+
+    def test_salda_primero_el_vencimiento_mas_proximo(self):
+        self._pagar(15.0, orden='fecha_estimada_pago')
+        self.assertEqual(self.reciente.estado, 'pagado')
+        self.assertEqual(self.media.monto_pendiente, 5.0)
+        self.assertEqual(self.antigua.monto_pendiente, 10.0)
+
+    def test_monto_mayor_que_la_deuda_falla(self):
+        with self.assertRaises(UserError):
+            self._pagar(30.01)
+        self.assertFalse(self.antigua.pagos_ids | self.media.pagos_ids | self.reciente.pagos_ids)
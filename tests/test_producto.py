@@ -0,0 +1,30 @@
+from odoo.tests import tagged
+
+from .common import VentasCase
+
+
+@tagged('post_install', '-at_install')
+class TestContadoresProducto(VentasCase):
+
+    def _contadores(self):
+        return {campo: self.producto[campo] for campo in (
+            'total_ventas', 'cantidad_vendida', 'ingresos_total', 'total_deudas_pendientes',
+        )}
+
+    def test_deltas_igual_a_reconstruir(self):
+        contado = self._venta(cantidad=2)
+        credito = self._venta_credito(cantidad=1)
+        otra = self._venta(tipo_pago='transferencia')
+        contado.write({'cantidad': 3})
+        otra.write({'tipo_pago': 'deuda', 'persona_id': self.persona.id,
+                    'fecha_estimada_pago': self.manana})
+        self.env['ventas.pago.deuda'].create({'deuda_id': credito.deuda_id.id, 'monto': 10.0})
+        otra.unlink()
+
+        self.assertEqual(self.producto.total_ventas, 2)
+        self.assertEqual(self.producto.cantidad_vendida, 4)
+        self.assertEqual(self.producto.ingresos_total, 40.0)
+        self.assertEqual(self.producto.total_deudas_pendientes, 0)
+        incremental = self._contadores()
+        self.producto._recalcular_totales_producto()
+        self.assertEqual(self._contadores(), incremental)
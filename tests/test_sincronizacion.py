@@ -0,0 +1,57 @@
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import VentasCase
+
+
+@tagged('post_install', '-at_install')
+class TestSincronizacion(VentasCase):
+
+    def _fila_venta(self, **valores):
+        return dict({
+            'clave': 'venta-1',
+            'viaje_producto_id': self.viaje_producto.id,
+            'cantidad': 1,
+            'tipo_pago': 'efectivo',
+            'fecha_venta': fields.Datetime.to_string(fields.Datetime.now()),
+        }, **valores)
+
+    def test_reenvio_no_duplica(self):
+        Sincronizacion = self.env['ventas.sincronizacion']
+        primera = Sincronizacion.aplicar_lote([self._fila_venta()])
+        segunda = Sincronizacion.aplicar_lote([self._fila_venta()])
+        self.assertEqual(primera['ventas'], segunda['ventas'])
+        self.assertEqual(self.viaje_producto.cantidad_vendido, 1)
+
+    def test_reenvio_de_viaje_cerrado(self):
+        Sincronizacion = self.env['ventas.sincronizacion']
+        primera = Sincronizacion.aplicar_lote([self._fila_venta()])
+        self.viaje.action_cerrar_viaje()
+        segunda = Sincronizacion.aplicar_lote([self._fila_venta()])
+        self.assertEqual(primera['ventas'], segunda['ventas'])
+
+    def test_producto_desconocido(self):
+        Sincronizacion = self.env['ventas.sincronizacion']
+        with self.assertRaises(UserError):
+            Sincronizacion.aplicar_lote([self._fila_venta(viaje_producto_id=0)])
+        fila = self._fila_venta()
+        del fila['viaje_producto_id']
+        with self.assertRaises(UserError):
+            Sincronizacion.aplicar_lote([fila])
+
+    def test_pago_mal_formado(self):
+        pago = {
+            'clave': 'pago-1',
+            'deuda_id': 0,
+            'monto': 'diez',
+            'fecha_pago': fields.Datetime.to_string(fields.Datetime.now()),
+        }
+        with self.assertRaises(UserError):
+            self.env['ventas.sincronizacion'].aplicar_lote(pagos=[pago])
+
+    def test_fila_sin_fecha(self):
+        fila = self._fila_venta()
+        del fila['fecha_venta']
+        with self.assertRaises(UserError):
+            self.env['ventas.sincronizacion'].aplicar_lote([fila])
@@ -0,0 +1,75 @@
+from odoo.exceptions import UserError, ValidationError
+from odoo.tests import tagged
+
+from .common import VentasCase
+
+
+@tagged('post_install', '-at_install')
+class TestVentaCredito(VentasCase):
+
+    def test_pasar_a_contado_borra_la_deuda(self):
+        venta = self._venta_credito(cantidad=2)
+        deuda = venta.deuda_id
+        venta.write({'tipo_pago': 'efectivo'})
+        self.assertFalse(deuda.exists())
+        self.assertFalse(venta.deuda_id)
+        self.assertEqual(self.viaje.total_deuda, 0.0)
+        self.assertEqual(self.viaje.total_efectivo, 20.0)
+        self.assertEqual(self.viaje_producto.cantidad_vendido, 2)
+
+    def test_pasar_a_contado_con_pagos_falla(self):
+        venta = self._venta_credito()
+        self.env['ventas.pago.deuda'].create({'deuda_id': venta.deuda_id.id, 'monto': 5.0})
+        with self.assertRaises(UserError):
+            venta.write({'tipo_pago': 'transferencia'})
+
+    def test_cambios_se_copian_a_la_deuda(self):
+        venta = self._venta_credito(cantidad=2)
+        venta.write({'cantidad': 3, 'precio_unitario': 12.0})
+        self.assertEqual(venta.deuda_id.cantidad, 3)
+        self.assertEqual(venta.deuda_id.precio_unitario, 12.0)
+        self.assertEqual(venta.deuda_id.monto_total, 36.0)
+        self.assertEqual(self.viaje.total_deuda, 36.0)
+        self.assertEqual(self.viaje_producto.cantidad_vendido, 3)
+
+    def test_borrar_venta_borra_su_deuda(self):
+        venta = self._venta_credito(cantidad=2)
+        deuda = venta.deuda_id
+        venta.unlink()
+        self.assertFalse(deuda.exists())
+        self.assertEqual(self.viaje.total_deuda, 0.0)
+        self.assertEqual(self.viaje_producto.cantidad_vendido, 0)
+
+    def test_borrar_venta_con_pagos_falla(self):
+        venta = self._venta_credito()
+        self.env['ventas.pago.deuda'].create({'deuda_id': venta.deuda_id.id, 'monto': 5.0})
+        with self.assertRaises(UserError):
+            venta.unlink()
+
+
+@tagged('post_install', '-at_install')
+class TestReservaStock(VentasCase):
+
+    def test_no_vende_mas_que_el_stock(self):
+        self._venta(cantidad=8)
+        with self.assertRaises(ValidationError):
+            self._venta(cantidad=3)
+        self.assertEqual(self.viaje_producto.cantidad_vendido, 8)
+        self.assertEqual(self.viaje_producto.por_vender, 2)
+
+    def test_lote_se_reserva_completo_o_nada(self):
+        with self.assertRaises(ValidationError):
+            self.env['ventas.venta'].create_batch([{
+                'viaje_id': self.viaje.id,
+                'viaje_producto_id': self.viaje_producto.id,
+                'cantidad': cantidad,
+                'tipo_pago': 'efectivo',
+            } for cantidad in (6, 5)])
+        self.assertEqual(self.viaje_producto.por_vender, 10)
+
+    def test_editar_por_encima_del_stock_falla(self):
+        venta = self._venta(cantidad=4)
+        self._venta_credito(cantidad=5)
+        with self.assertRaises(ValidationError):
+            venta.write({'cantidad': 6})
+        self.assertEqual(self.viaje_producto.por_vender, 1)
@@ -0,0 +1,82 @@
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import VentasCase
+
+# Totales del viaje mantenidos con deltas
+TOTALES = (
+    'total_efectivo', 'total_transferencia', 'total_deuda', 'ganancia_total_real',
+    'total_dinero_en_mano', 'total_vendido',
+)
+
+
+@tagged('post_install', '-at_install')
+class TestTotalesIncrementales(VentasCase):
+
+    def _totales(self):
+        self.viaje.invalidate_recordset()
+        return {campo: self.viaje[campo] for campo in TOTALES}
+
+    def test_deltas_igual_a_reconstruir(self):
+        Pago = self.env['ventas.pago.deuda']
+        contado = self._venta(cantidad=2)
+        transferencia = self._venta(tipo_pago='transferencia')
+        credito = self._venta_credito(cantidad=2)
+        contado.write({'cantidad': 3})
+        transferencia.write({'tipo_pago': 'efectivo'})
+        pago = Pago.create({'deuda_id': credito.deuda_id.id, 'monto': 5.0, 'tipo_pago': 'transferencia'})
+        Pago.create({'deuda_id': credito.deuda_id.id, 'monto': 4.0, 'tipo_pago': 'efectivo'})
+        pago.write({'monto': 6.0})
+        directa = self._deuda()
+        directa.write({'cantidad': 2})
+        directa.unlink()
+        self._venta().unlink()
+
+        incremental = self._totales()
+        self.assertEqual(incremental, {
+            'total_efectivo': 44.0,
+            'total_transferencia': 6.0,
+            'total_deuda': 10.0,
+            'ganancia_total_real': 16.0,
+            'total_dinero_en_mano': 50.0,
+            'total_vendido': 60.0,
+        })
+        self.viaje._recalcular_totales()
+        self.assertEqual(self._totales(), incremental)
+
+
+@tagged('post_install', '-at_install')
+class TestCierreViaje(VentasCase):
+
+    def test_no_cierra_con_deudas_abiertas(self):
+        self._venta_credito()
+        with self.assertRaises(UserError):
+            self.viaje.action_cerrar_viaje()
+        self.assertFalse(self.viaje.fecha_cierre)
+
+    def test_cerrar_congela_y_reabrir_devuelve(self):
+        venta = self._venta(cantidad=2)
+        credito = self._venta_credito()
+        self.env['ventas.pago.deuda'].create({'deuda_id': credito.deuda_id.id, 'monto': 10.0})
+        totales = {campo: self.viaje[campo] for campo in TOTALES}
+
+        self.viaje.action_cerrar_viaje()
+        self.assertTrue(self.viaje.fecha_cierre)
+        self.assertFalse(self.viaje.active)
+        self.assertFalse(venta.active)
+        self.assertFalse(credito.deuda_id.active)
+        self.assertFalse(self.env['ventas.venta'].search([('viaje_id', '=', self.viaje.id)]))
+        for campo, valor in totales.items():
+            self.assertEqual(self.viaje.resumen_cierre[campo], valor)
+        # Los totales congelados no se tocan mientras está cerrado
+        with self.assertRaises(UserError):
+            venta.write({'cantidad': 1})
+
+        self.viaje.action_reabrir_viaje()
+        self.assertFalse(self.viaje.fecha_cierre)
+        self.assertTrue(self.viaje.active)
+        self.assertTrue(venta.active)
+        self.assertTrue(credito.deuda_id.active)
+        self.assertEqual({campo: self.viaje[campo] for campo in TOTALES}, totales)
+        venta.write({'cantidad': 1})
+        self.assertEqual(self.viaje.total_efectivo, totales['total_efectivo'] - 10.0)
@@ -0,0 +1,5 @@
+from . import venta_lote
+from . import importacion
+from . import exportacion
+from . import cierre_diario
+from . import pago_persona
\ No newline at end of file
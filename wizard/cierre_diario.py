@@ -0,0 +1,32 @@
+from odoo import models, fields
+
+
+class CierreDiarioAsistente(models.TransientModel):
+    _name = 'ventas.cierre.diario.asistente'
+    _description = 'Asistente de Cierre Diario'
+
+    fecha = fields.Date(
+        string='Día',
+        required=True,
+        default=fields.Date.context_today
+    )
+    efectivo_contado = fields.Float(
+        string='Efectivo Contado',
+        help='Efectivo contado físicamente en caja al cerrar'
+    )
+    nota = fields.Text(string='Nota')
+
+    def action_cerrar(self):
+        """Congela el resumen del día y abre el cierre creado"""
+        self.ensure_one()
+        cierre = self.env['ventas.cierre.diario'].cerrar_dia(
+            self.fecha,
+            efectivo_contado=self.efectivo_contado,
+            nota=self.nota,
+        )
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': cierre._name,
+            'res_id': cierre.id,
+            'view_mode': 'form',
+        }
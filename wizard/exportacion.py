@@ -0,0 +1,33 @@
+from urllib.parse import urlencode
+
+from odoo import models, fields
+
+
+class Exportacion(models.TransientModel):
+    _name = 'ventas.exportacion'
+    _description = 'Exportación CSV de Ventas, Deudas y Pagos'
+
+    tipo = fields.Selection([
+        ('ventas', 'Ventas'),
+        ('deudas', 'Deudas'),
+        ('pagos', 'Pagos de Deudas'),
+    ], string='Exportar', required=True, default='ventas')
+    desde = fields.Date(string='Desde')
+    hasta = fields.Date(string='Hasta')
+    comprimir = fields.Boolean(string='Comprimir (gzip)')
+
+    def action_exportar(self):
+        """Descarga el CSV desde /ventas/exportar, que lo envía en streaming"""
+        self.ensure_one()
+        parametros = {
+            clave: valor for clave, valor in {
+                'desde': self.desde and fields.Date.to_string(self.desde),
+                'hasta': self.hasta and fields.Date.to_string(self.hasta),
+                'comprimir': self.comprimir and '1',
+            }.items() if valor
+        }
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/ventas/exportar/{self.tipo}?{urlencode(parametros)}',
+            'target': 'self',
+        }
@@ -0,0 +1,186 @@
+import csv
+import io
+import time
+from itertools import islice
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+# Columnas esperadas en el CSV según el tipo de importación
+COLUMNAS = {
+    'viaje_producto': ('producto', 'cantidad', 'precio_compra', 'precio_venta'),
+    'venta': ('producto', 'cantidad', 'tipo_pago', 'fecha_venta', 'persona', 'fecha_estimada_pago'),
+}
+
+
+def _lotes(filas, tamano):
+    """Agrupa un iterable en listas de ``tamano`` sin materializarlo entero"""
+    filas = iter(filas)
+    while True:
+        lote = list(islice(filas, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def _numero(valor, tipo=float):
+    return tipo((valor or '0').strip().replace(',', '.'))
+
+
+class Importacion(models.TransientModel):
+    _name = 'ventas.importacion'
+    _description = 'Importación CSV de Productos del Viaje y Ventas'
+
+    tipo = fields.Selection([
+        ('viaje_producto', 'Productos del Viaje'),
+        ('venta', 'Ventas'),
+    ], string='Importar', required=True, default='viaje_producto')
+    viaje_id = fields.Many2one(
+        'ventas.viaje',
+        string='Viaje',
+        required=True
+    )
+    archivo = fields.Binary(string='Archivo CSV', required=True, attachment=True)
+    nombre_archivo = fields.Char(string='Nombre del Archivo')
+    delimitador = fields.Char(string='Delimitador', default=',', required=True)
+    tamano_lote = fields.Integer(
+        string='Filas por Lote',
+        default=1000,
+        required=True,
+        help='Se confirma la transacción al terminar cada lote'
+    )
+    resultado = fields.Text(string='Resultado', readonly=True)
+
+    def _abrir_archivo(self):
+        """Devuelve el CSV como flujo binario, leyendo del filestore si es posible"""
+        adjunto = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', 'archivo'),
+        ], limit=1)
+        if adjunto.store_fname:
+            return open(adjunto._full_path(adjunto.store_fname), 'rb')
+        return io.BytesIO(adjunto.raw or b'')
+
+    def _leer_filas(self, flujo):
+        """Generador de ``(numero_fila, dict)`` sobre el CSV"""
+        texto = io.TextIOWrapper(flujo, encoding='utf-8-sig', newline='')
+        lector = csv.DictReader(texto, delimiter=self.delimitador)
+        faltantes = set(COLUMNAS[self.tipo][:2]) - set(lector.fieldnames or ())
+        if faltantes:
+            raise UserError('Faltan columnas en el archivo: %s' % ', '.join(sorted(faltantes)))
+        for numero, fila in enumerate(lector, start=2):
+            yield numero, {clave.strip(): (valor or '').strip() for clave, valor in fila.items() if clave}
+
+    @api.model
+    def _mapa_nombres(self, modelo):
+        """``{nombre: id}`` del modelo, construido una sola vez"""
+        return {
+            registro['nombre']: registro['id']
+            for registro in self.env[modelo].search_read([], ['nombre'])
+        }
+
+    def _comprobar_nombres(self, mapa, lote, columna, etiqueta):
+        """Falla con la lista de filas cuyo ``columna`` no está en ``mapa``"""
+        errores = [
+            'Fila %s: no existe %s "%s"' % (numero, etiqueta, fila[columna])
+            for numero, fila in lote
+            if fila.get(columna) and fila[columna] not in mapa
+        ]
+        if errores:
+            raise UserError('\n'.join(errores))
+
+    def _valores_viaje_producto(self, lote, productos):
+        self._comprobar_nombres(productos, lote, 'producto', 'el producto')
+        return [{
+            'viaje_id': self.viaje_id.id,
+            'producto_id': productos[fila['producto']],
+            'cantidad': _numero(fila['cantidad'], int),
+            'precio_compra': _numero(fila.get('precio_compra')),
+            'precio_venta': _numero(fila.get('precio_venta')),
+        } for _numero_fila, fila in lote]
+
+    def _valores_venta(self, lote, productos_viaje, personas):
+        self._comprobar_nombres(personas, lote, 'persona', 'la persona')
+        valores = []
+        for numero, fila in lote:
+            viaje_producto_id = productos_viaje.get(fila['producto'])
+            if not viaje_producto_id:
+                raise UserError(
+                    'Fila %s: el producto "%s" no está en el viaje %s'
+                    % (numero, fila['producto'], self.viaje_id.nombre)
+                )
+            vals = {
+                'viaje_id': self.viaje_id.id,
+                'viaje_producto_id': viaje_producto_id,
+                'cantidad': _numero(fila['cantidad'], int),
+                'tipo_pago': fila.get('tipo_pago') or 'efectivo',
+                'persona_id': personas.get(fila.get('persona')) or False,
+                'fecha_estimada_pago': fila.get('fecha_estimada_pago') or False,
+            }
+            if fila.get('fecha_venta'):
+                vals['fecha_venta'] = fila['fecha_venta']
+            valores.append(vals)
+        return valores
+
+    def action_importar(self):
+        """Importa el CSV por lotes, confirmando cada lote.
+
+        Los totales del viaje no se ajustan fila a fila: se reconstruyen una
+        sola vez al terminar, o al fallar un lote. Los productos y personas
+        deben existir; los desconocidos se informan con su número de fila.
+        """
+        self.ensure_one()
+        self.viaje_id._comprobar_abiertos()
+        if self.tamano_lote <= 0:
+            raise UserError('El tamaño de lote debe ser positivo')
+        modelo = 'ventas.viaje.producto' if self.tipo == 'viaje_producto' else 'ventas.venta'
+        Modelo = self.env[modelo].with_context(ventas_omitir_deltas=True)
+        if self.tipo == 'viaje_producto':
+            productos = self._mapa_nombres('ventas.producto')
+        else:
+            personas = self._mapa_nombres('ventas.persona')
+            productos_viaje = {
+                viaje_producto.producto_id.nombre: viaje_producto.id
+                for viaje_producto in self.viaje_id.viaje_producto_ids
+            }
+
+        inicio = time.perf_counter()
+        filas = lotes = 0
+        try:
+            with self._abrir_archivo() as flujo:
+                for lote in _lotes(self._leer_filas(flujo), self.tamano_lote):
+                    if self.tipo == 'viaje_producto':
+                        valores = self._valores_viaje_producto(lote, productos)
+                    else:
+                        valores = self._valores_venta(lote, productos_viaje, personas)
+                    Modelo.create(valores)
+                    self.env.flush_all()
+                    filas += len(lote)
+                    lotes += 1
+                    self.env.cr.commit()  # pylint: disable=invalid-commit
+                    # Vaciar la caché mantiene la memoria acotada entre lotes
+                    self.env.invalidate_all()
+        except Exception:
+            # Los lotes ya confirmados se quedan: se descarta el que falló y
+            # los totales del viaje se reconstruyen antes de informar el error
+            self.env.cr.rollback()
+            self.env.invalidate_all()
+            self.viaje_id._recalcular_totales()
+            self.viaje_id.viaje_producto_ids.producto_id._recalcular_totales_producto()
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+            raise
+
+        self.viaje_id._recalcular_totales()
+        self.viaje_id.viaje_producto_ids.producto_id._recalcular_totales_producto()
+        segundos = max(time.perf_counter() - inicio, 1e-6)
+        self.resultado = '%s filas en %s lotes, %.1f s (%.0f filas/s)' % (
+            filas, lotes, segundos, filas / segundos,
+        )
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -0,0 +1,74 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools import float_compare, float_is_zero, float_round
+
+# Orden en que se saldan las deudas abiertas
+ORDENES = {
+    'fecha_creacion': 'fecha_creacion, id',
+    'fecha_estimada_pago': 'fecha_estimada_pago NULLS LAST, fecha_creacion, id',
+}
+
+
+class PagoPersona(models.TransientModel):
+    _name = 'ventas.pago.persona'
+    _description = 'Pago de una Persona Repartido entre sus Deudas'
+
+    persona_id = fields.Many2one(
+        'ventas.persona',
+        string='Persona',
+        required=True
+    )
+    total_deuda_pendiente = fields.Float(related='persona_id.total_deuda_pendiente')
+    monto = fields.Float(string='Monto', required=True)
+    tipo_pago = fields.Selection(
+        selection=lambda self: self.env['ventas.pago.deuda']._fields['tipo_pago'].selection,
+        string='Tipo de Pago',
+        required=True,
+        default='efectivo'
+    )
+    fecha_pago = fields.Datetime(
+        string='Fecha de Pago',
+        required=True,
+        default=fields.Datetime.now
+    )
+    orden = fields.Selection([
+        ('fecha_creacion', 'Deuda más antigua primero'),
+        ('fecha_estimada_pago', 'Vencimiento más próximo primero'),
+    ], string='Saldar', required=True, default='fecha_creacion')
+
+    @api.model
+    def _repartir(self, deudas, monto):
+        """``[(deuda, monto)]`` que salda ``deudas`` en orden hasta agotar ``monto``"""
+        reparto = []
+        restante = monto
+        for deuda in deudas:
+            if float_is_zero(restante, precision_digits=2):
+                break
+            parte = float_round(min(restante, deuda.monto_pendiente), precision_digits=2)
+            if parte > 0:
+                reparto.append((deuda, parte))
+                restante -= parte
+        return reparto
+
+    def action_pagar(self):
+        """Crea todos los pagos con un único create de ventas.pago.deuda"""
+        self.ensure_one()
+        if self.monto <= 0:
+            raise UserError('El monto debe ser positivo')
+        deudas = self.env['ventas.deuda'].search([
+            ('persona_id', '=', self.persona_id.id),
+            ('estado', '!=', 'pagado'),
+        ], order=ORDENES[self.orden])
+        pendiente = sum(deudas.mapped('monto_pendiente'))
+        if float_compare(self.monto, pendiente, precision_digits=2) > 0:
+            raise UserError(
+                'El monto (%.2f) supera lo que %s debe (%.2f)'
+                % (self.monto, self.persona_id.nombre, pendiente)
+            )
+        self.env['ventas.pago.deuda'].create([{
+            'deuda_id': deuda.id,
+            'monto': parte,
+            'tipo_pago': self.tipo_pago,
+            'fecha_pago': self.fecha_pago,
+        } for deuda, parte in self._repartir(deudas, self.monto)])
+        return {'type': 'ir.actions.act_window_close'}
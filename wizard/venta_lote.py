@@ -0,0 +1,67 @@
+from odoo import models, fields
+
+
+class VentaLote(models.TransientModel):
+    _name = 'ventas.venta.lote'
+    _description = 'Registro de Ventas en Lote'
+
+    viaje_id = fields.Many2one(
+        'ventas.viaje',
+        string='Viaje',
+        required=True
+    )
+    linea_ids = fields.One2many(
+        'ventas.venta.lote.linea',
+        'lote_id',
+        string='Ventas'
+    )
+
+    def _valores_venta(self, linea):
+        return {
+            'viaje_id': self.viaje_id.id,
+            'viaje_producto_id': linea.viaje_producto_id.id,
+            'cantidad': linea.cantidad,
+            'tipo_pago': linea.tipo_pago,
+            'persona_id': linea.persona_id.id,
+            'fecha_estimada_pago': linea.fecha_estimada_pago,
+        }
+
+    def action_registrar(self):
+        """Crea todas las líneas del lote con ventas.venta.create_batch"""
+        self.ensure_one()
+        self.env['ventas.venta'].create_batch(
+            [self._valores_venta(linea) for linea in self.linea_ids]
+        )
+        return {'type': 'ir.actions.act_window_close'}
+
+
+class VentaLoteLinea(models.TransientModel):
+    _name = 'ventas.venta.lote.linea'
+    _description = 'Línea de Venta en Lote'
+
+    lote_id = fields.Many2one(
+        'ventas.venta.lote',
+        string='Lote',
+        required=True,
+        ondelete='cascade'
+    )
+    viaje_id = fields.Many2one(related='lote_id.viaje_id')
+    viaje_producto_id = fields.Many2one(
+        'ventas.viaje.producto',
+        string='Producto del Viaje',
+        required=True,
+        domain="[('viaje_id', '=', viaje_id)]"
+    )
+    por_vender = fields.Integer(related='viaje_producto_id.por_vender')
+    cantidad = fields.Integer(string='Cantidad', required=True, default=1)
+    tipo_pago = fields.Selection(
+        selection=lambda self: self.env['ventas.venta']._fields['tipo_pago'].selection,
+        string='Tipo de Pago',
+        required=True,
+        default='efectivo'
+    )
+    persona_id = fields.Many2one(
+        'ventas.persona',
+        string='Persona'
+    )
+    fecha_estimada_pago = fields.Date(string='Fecha Estimada de Pago')